@@ -5,6 +5,9 @@ from sib_api_v3_sdk.rest import ApiException
 
 
 class TransactionalEmails:
+    # Brevo accepts at most this many message versions in one request
+    MAX_MESSAGE_VERSIONS = 1000
+
     def __init__(self):
         configuration = sib_api_v3_sdk.Configuration()
         configuration.api_key["api-key"] = st.secrets["BREVO_API_KEY"]
@@ -212,3 +215,67 @@ class TransactionalEmails:
 
         except ApiException as e:
             return False
+
+    def send_warranty_expiry_reminder_mails(self, reminders):
+        subject = "The warranty on your appliance is about to expire"
+
+        # Rendered by Brevo once per message version using its params
+        html_content = """
+        <HTML>
+            <BODY>
+                Dear {{ params.customer_name }},
+                <BR><BR>
+                The warranty on the following appliances registered with LogIQ expires on <B>{{ params.warranty_expiration }}</B>:
+                <BR><UL>
+                {% for appliance in params.appliances %}
+                    <LI>{{ appliance.brand }} {{ appliance.sub_category }} (Model No.: {{ appliance.model_number }}, Serial No.: {{ appliance.serial_number }})</LI>
+                {% endfor %}
+                </UL>
+                You can still raise service requests for these appliances from the LogIQ app before the warranty ends.
+                <BR><BR>
+                Warm regards,
+                <BR>
+                LogIQ Support Team
+            </BODY>
+        </HTML>
+        """
+
+        message_versions = [
+            {
+                "to": [
+                    {
+                        "email": reminder["email"],
+                        "name": reminder["customer_name"],
+                    }
+                ],
+                "params": {
+                    "customer_name": reminder["customer_name"],
+                    "warranty_expiration": reminder["warranty_expiration"],
+                    "appliances": reminder["appliances"],
+                },
+            }
+            for reminder in reminders
+            if reminder.get("email")
+        ]
+
+        sent_count = 0
+
+        for start in range(0, len(message_versions), self.MAX_MESSAGE_VERSIONS):
+            batch = message_versions[start: start + self.MAX_MESSAGE_VERSIONS]
+
+            smtp_payload = sib_api_v3_sdk.SendSmtpEmail(
+                sender=self.sender,
+                subject=subject,
+                html_content=html_content,
+                message_versions=batch,
+            )
+
+            try:
+                api_response = self.api_instance.send_transac_email(
+                    smtp_payload)
+                sent_count += len(batch)
+
+            except ApiException as e:
+                pass
+
+        return sent_count
@@ -1,6 +1,8 @@
 import streamlit as st
 from twilio.rest import Client
 
+from concurrent.futures import ThreadPoolExecutor
+
 
 class NotificationSMS:
     def __init__(self):
@@ -107,3 +109,42 @@ class NotificationSMS:
 
         except Exception as error:
             return False
+
+    def send_warranty_expiry_reminder_sms(
+        self, receivers_phone_number, appliance_count, warranty_expiration
+    ):
+        sms_body = f"""
+        Warranty on {appliance_count} of your registered appliance(s)
+        expires on {warranty_expiration} - LogIQ Support Team
+        """
+
+        receivers_phone_number = receivers_phone_number.replace("+91", "")
+
+        try:
+            message = self.client.messages.create(
+                body=sms_body,
+                to=f"+91{receivers_phone_number}",
+                messaging_service_sid=self.messaging_service_sid,
+            )
+
+            return True
+
+        except Exception as error:
+            return False
+
+    def send_warranty_expiry_reminder_sms_messages(self, reminders, max_workers=8):
+        reminders = [
+            reminder for reminder in reminders if reminder.get("phone_number")]
+
+        # Twilio has no bulk endpoint, overlap the per-message HTTP calls
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda reminder: self.send_warranty_expiry_reminder_sms(
+                    reminder["phone_number"],
+                    len(reminder["appliances"]),
+                    reminder["warranty_expiration"],
+                ),
+                reminders,
+            )
+
+            return sum(results)
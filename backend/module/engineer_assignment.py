@@ -1,13 +1,37 @@
 import html
 import time
+import logging
+import threading
 
 from backend.utils.geo_operations import LocationServices
+from backend.utils.spatial_index import EngineerSpatialIndex
 
+from database.cloud_sql.models import ModelEngineers
 from database.cloud_sql.queries import QueryEngineers
 from database.firebase.firestore import OnsiteServiceRequestCollection
 
 
+logger = logging.getLogger(__name__)
+
+
+def _format_engineer_address(engineer):
+    return f"{
+        engineer['street']}, {
+        engineer['city']}, {
+        engineer['district']}, {
+        engineer['state']} - {
+        engineer['zip_code']}"
+
+
 class OnsiteServiceRequestAssignment:
+    SPATIAL_INDEX_TTL_SECONDS = 300
+    SPATIAL_SEARCH_RADIUS_KM = 50
+    SPATIAL_SEARCH_MAX_ENGINEERS = 10
+
+    _engineer_spatial_index = None
+    _engineer_spatial_index_built_on = 0
+    _geocoding_lock = threading.Lock()
+
     def __init__(self):
         pass
 
@@ -15,11 +39,148 @@ class OnsiteServiceRequestAssignment:
         sanitized_description = html.escape(description)
         return sanitized_description
 
+    @classmethod
+    def precompute_engineer_coordinates(cls, engineers=None):
+        if not cls._geocoding_lock.acquire(blocking=False):
+            return 0
+
+        try:
+            if engineers is None:
+                engineers = QueryEngineers().fetch_available_engineers_with_skills()
+
+            location_services = LocationServices(priority="ui")
+            engineer_coordinates = []
+
+            for engineer in engineers:
+                engineer_address = _format_engineer_address(engineer)
+
+                if engineer["geocoded_address"] == engineer_address:
+                    continue
+
+                coordinates = location_services.geocode_address(
+                    engineer_address)
+
+                if coordinates:
+                    engineer_coordinates.append(
+                        {
+                            "engineer_id": engineer["engineer_id"],
+                            "address": engineer_address,
+                            "latitude": coordinates[0],
+                            "longitude": coordinates[1],
+                        }
+                    )
+
+            if engineer_coordinates:
+                ModelEngineers().save_engineer_coordinates(engineer_coordinates)
+
+                # Pick the newly geocoded engineers up on the next request
+                cls._engineer_spatial_index_built_on = 0
+
+            return len(engineer_coordinates)
+
+        except Exception as error:
+            logger.warning("Geocoding engineer addresses failed: %s", error)
+            return 0
+
+        finally:
+            cls._geocoding_lock.release()
+
+    def _get_engineer_spatial_index(self):
+        cls = OnsiteServiceRequestAssignment
+
+        if (cls._engineer_spatial_index is not None) and (
+            time.time() - cls._engineer_spatial_index_built_on
+            < self.SPATIAL_INDEX_TTL_SECONDS
+        ):
+            return cls._engineer_spatial_index
+
+        query_engineers = QueryEngineers()
+        engineer_spatial_index = EngineerSpatialIndex()
+        ungeocoded_engineers = []
+
+        # Coordinates are persisted, only new engineers and changed addresses
+        # still need geocoding and that happens off the request path
+        for engineer in query_engineers.fetch_available_engineers_with_skills():
+            if engineer["geocoded_address"] != _format_engineer_address(engineer):
+                ungeocoded_engineers.append(engineer)
+                continue
+
+            engineer_spatial_index.add_engineer(
+                engineer["engineer_id"],
+                engineer["coordinates"][0],
+                engineer["coordinates"][1],
+                skills=engineer["skills"],
+                specializations=engineer["specializations"],
+            )
+
+        cls._engineer_spatial_index = engineer_spatial_index
+        cls._engineer_spatial_index_built_on = time.time()
+
+        if ungeocoded_engineers:
+            threading.Thread(
+                target=cls.precompute_engineer_coordinates,
+                args=(ungeocoded_engineers,),
+                daemon=True,
+            ).start()
+
+        return engineer_spatial_index
+
+    def _fetch_nearest_available_engineers(
+        self, customer_address, appliance_sub_category, service_type
+    ):
+        location_services = LocationServices(priority="assignment")
+
+        customer_coordinates = location_services.geocode_address(
+            customer_address)
+
+        if not customer_coordinates:
+            return []
+
+        engineer_spatial_index = self._get_engineer_spatial_index()
+
+        nearest_engineers = engineer_spatial_index.query_nearest(
+            customer_coordinates[0],
+            customer_coordinates[1],
+            self.SPATIAL_SEARCH_MAX_ENGINEERS,
+            skills=[service_type],
+            specializations=[appliance_sub_category],
+            max_radius_km=self.SPATIAL_SEARCH_RADIUS_KM,
+        )
+
+        nearest_engineer_ids = [engineer_id for _, engineer_id in nearest_engineers]
+
+        # The index can be minutes old, drop engineers who have since gone
+        # unavailable
+        available_engineer_ids = QueryEngineers().fetch_available_engineer_ids(
+            nearest_engineer_ids
+        )
+
+        return [
+            engineer_id
+            for engineer_id in nearest_engineer_ids
+            if engineer_id in available_engineer_ids
+        ]
+
     def _fetch_nearby_available_engineers(
-        self, district, appliance_sub_category, service_type
+        self, district, appliance_sub_category, service_type, customer_address=None
     ):
+        if customer_address:
+            try:
+                available_engineer_ids = self._fetch_nearest_available_engineers(
+                    customer_address, appliance_sub_category, service_type
+                )
+
+                if len(available_engineer_ids) > 0:
+                    return available_engineer_ids
+
+            except Exception as error:
+                logger.warning(
+                    "Spatial engineer lookup failed, falling back to district query: %s",
+                    error,
+                )
+
         query_engineers = QueryEngineers()
-        location_services = LocationServices()
+        location_services = LocationServices(priority="assignment")
 
         available_engineer_ids = query_engineers.fetch_available_engineer_for_service_request(
             district, appliance_sub_category, service_type
@@ -84,7 +245,7 @@ class OnsiteServiceRequestAssignment:
             engineer_addresses.append(engineer_address)
             engineer_data_map[engineer_id] = engineer_data
 
-        location_services = LocationServices()
+        location_services = LocationServices(priority="assignment")
 
         try:
             for attempt in range(3):
@@ -148,6 +309,7 @@ class OnsiteServiceRequestAssignment:
                 appliance_data.get("city"),
                 appliance_data.get("sub_category"),
                 appliance_data.get("request_type"),
+                customer_address=customer_address,
             )
 
             best_matched_engineer_id = self._rank_engineers(
@@ -0,0 +1,88 @@
+from backend.utils.geo_operations import LocationServices
+from backend.utils.ttl_cache import TTLCache
+
+
+class EngineerRoutePlanner:
+    MAX_STOPS = 23
+
+    # Travel times drift with traffic, keep matrices for a few minutes only
+    _distance_matrix_cache = TTLCache(max_size=128, ttl_seconds=600)
+
+    def __init__(self):
+        self.location_services = LocationServices()
+
+    def _get_distance_matrix(self, locations):
+        return EngineerRoutePlanner._distance_matrix_cache.get(
+            tuple(locations),
+            lambda: self.location_services.get_travel_duration_matrix(
+                locations),
+        )
+
+    def _get_route_cost(self, route, distance_matrix):
+        return sum(
+            distance_matrix[route[idx]][route[idx + 1]]
+            for idx in range(len(route) - 1)
+        )
+
+    def _nearest_neighbour_route(self, distance_matrix):
+        route = [0]
+        unvisited = set(range(1, len(distance_matrix)))
+
+        while unvisited:
+            current_stop = route[-1]
+            next_stop = min(
+                unvisited, key=lambda stop: (distance_matrix[current_stop][stop], stop)
+            )
+
+            route.append(next_stop)
+            unvisited.remove(next_stop)
+
+        return route
+
+    def _two_opt(self, route, distance_matrix):
+        improved = True
+
+        while improved:
+            improved = False
+
+            for i in range(1, len(route) - 1):
+                for j in range(i + 1, len(route)):
+                    candidate_route = route[:i] + route[i: j + 1][::-1] + route[j + 1:]
+
+                    if self._get_route_cost(
+                        candidate_route, distance_matrix
+                    ) < self._get_route_cost(route, distance_matrix):
+                        route = candidate_route
+                        improved = True
+
+        return route
+
+    def plan_route(self, origin, destinations):
+        if len(destinations) == 0:
+            raise ValueError("A route needs at least one stop")
+
+        if len(destinations) > self.MAX_STOPS:
+            raise ValueError(
+                f"A route can have at most {self.MAX_STOPS} stops, got {
+                    len(destinations)}"
+            )
+
+        locations = [origin] + list(destinations)
+        distance_matrix = self._get_distance_matrix(locations)
+
+        route = self._nearest_neighbour_route(distance_matrix)
+        route = self._two_opt(route, distance_matrix)
+
+        total_duration = round(
+            self._get_route_cost(route, distance_matrix) / 60, 1)
+
+        return [stop - 1 for stop in route[1:]], total_duration
+
+    def display_planned_route_with_folium(self, origin, destinations):
+        route, total_duration = self.plan_route(origin, destinations)
+
+        folium_map = self.location_services.display_multi_stop_route_with_folium(
+            origin, [destinations[stop] for stop in route]
+        )
+
+        return folium_map, route, total_duration
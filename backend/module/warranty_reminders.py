@@ -0,0 +1,95 @@
+import datetime
+import itertools
+
+from backend.channels.email_client import TransactionalEmails
+from backend.channels.sms_client import NotificationSMS
+
+from database.cloud_sql.queries import QueryCustomerAppliances
+
+
+class WarrantyExpiryReminders:
+    REMINDER_DAYS_BEFORE_EXPIRY = (30, 7, 1)
+    SCAN_BATCH_SIZE = 1000
+    NOTIFICATION_BATCH_SIZE = 500
+
+    def __init__(self, transactional_emails=None, notification_sms=None):
+        self.transactional_emails = transactional_emails or TransactionalEmails()
+        self.notification_sms = notification_sms or NotificationSMS()
+
+    def _group_reminders_by_customer(self, expiring_appliances):
+        # Rows arrive ordered by expiry date and customer, so each group is
+        # contiguous and only one customer's appliances are held at a time
+        for (warranty_expiration, customer_id), appliances in itertools.groupby(
+            expiring_appliances,
+            key=lambda appliance: (
+                appliance["warranty_expiration"],
+                appliance["customer_id"],
+            ),
+        ):
+            appliances = list(appliances)
+            customer = appliances[0]
+
+            yield {
+                "customer_id": customer_id,
+                "customer_name": f"{customer['first_name']} {customer['last_name']}",
+                "email": customer["email"],
+                "phone_number": customer["phone_number"],
+                "warranty_expiration": str(warranty_expiration),
+                "appliances": [
+                    {
+                        "brand": appliance["brand"],
+                        "sub_category": appliance["sub_category"],
+                        "model_number": appliance["model_number"],
+                        "serial_number": appliance["serial_number"],
+                    }
+                    for appliance in appliances
+                ],
+            }
+
+    def send_reminders_for_expiry_date(self, warranty_expiration_date):
+        query_customer_appliances = QueryCustomerAppliances()
+
+        expiring_appliances = (
+            query_customer_appliances.stream_appliances_with_warranty_expiring_between(
+                warranty_expiration_date,
+                warranty_expiration_date,
+                batch_size=self.SCAN_BATCH_SIZE,
+            )
+        )
+        reminders = self._group_reminders_by_customer(expiring_appliances)
+
+        summary = {"customers": 0, "emails_sent": 0, "sms_sent": 0}
+
+        while True:
+            batch = list(itertools.islice(
+                reminders, self.NOTIFICATION_BATCH_SIZE))
+
+            if not batch:
+                break
+
+            summary["customers"] += len(batch)
+            summary["emails_sent"] += (
+                self.transactional_emails.send_warranty_expiry_reminder_mails(
+                    batch)
+            )
+            summary["sms_sent"] += (
+                self.notification_sms.send_warranty_expiry_reminder_sms_messages(
+                    batch)
+            )
+
+        return summary
+
+    def send_reminders(self, reference_date=None):
+        reference_date = reference_date or datetime.date.today()
+        summaries = {}
+
+        for days_before_expiry in self.REMINDER_DAYS_BEFORE_EXPIRY:
+            warranty_expiration_date = reference_date + datetime.timedelta(
+                days=days_before_expiry
+            )
+
+            summaries[str(warranty_expiration_date)] = (
+                self.send_reminders_for_expiry_date(warranty_expiration_date)
+            )
+
+        return summaries
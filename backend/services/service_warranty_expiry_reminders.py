@@ -0,0 +1,39 @@
+import json
+import datetime
+import functions_framework
+
+from backend.module.warranty_reminders import WarrantyExpiryReminders
+
+
+@functions_framework.http
+def send_warranty_expiry_reminders(request):
+    request_json = request.get_json(silent=True)
+    request_args = request.args
+
+    reference_date = None
+
+    if request_json and "reference_date" in request_json:
+        reference_date = request_json.get("reference_date")
+
+    elif request_args and "reference_date" in request_args:
+        reference_date = request_args.get("reference_date")
+
+    if reference_date:
+        reference_date = datetime.date.fromisoformat(reference_date)
+
+    warranty_expiry_reminders = WarrantyExpiryReminders()
+    summaries = warranty_expiry_reminders.send_reminders(reference_date)
+
+    return json.dumps(summaries)
+
+
+if __name__ == "__main__":
+    warranty_expiry_reminders = WarrantyExpiryReminders()
+    summaries = warranty_expiry_reminders.send_reminders()
+
+    for warranty_expiration_date, summary in summaries.items():
+        print(
+            f"Warranties expiring on {warranty_expiration_date}:",
+            f"{summary['customers']} customers,",
+            f"{summary['emails_sent']} emails, {summary['sms_sent']} SMS sent",
+        )
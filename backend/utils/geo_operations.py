@@ -1,47 +1,169 @@
 import folium
-import polyline
+import threading
 import googlemaps
 
 import requests
 import streamlit as st
 
+from collections import OrderedDict
+
+from backend.utils.rate_limiter import MapsRateLimiter
+from backend.utils.route_geometry import (
+    decode_polyline,
+    get_tolerance_for_zoom,
+    pack_route,
+    simplify_route,
+    unpack_route,
+)
+
 
 class LocationServices:
-    def __init__(self):
+    ROUTE_CACHE_SIZE = 256
+
+    rate_limiter = MapsRateLimiter()
+    # Shared by every session thread, always accessed under the lock
+    _route_geometry_cache = OrderedDict()
+    _route_geometry_cache_lock = threading.Lock()
+
+    def __init__(self, priority="ui"):
         self.gmaps = googlemaps.Client(
             key=st.secrets["GOOGLE_MAPS_DISTANCE_MATRIX_API_KEY"]
         )
+        self.priority = priority
 
-    def _get_route_data(self, origin, destination):
+    def _call_maps_api(self, api_name, function, *args, **kwargs):
+        self.rate_limiter.acquire(api_name, self.priority)
+        return function(*args, **kwargs)
+
+    def get_rate_limiter_metrics(self):
+        return self.rate_limiter.get_metrics()
+
+    def _get_route_data(self, origin, destination, waypoints=None):
         url = f"https://maps.googleapis.com/maps/api/directions/json?origin={origin}&destination={destination}&key={
             str(
                 st.secrets['GOOGLE_MAPS_DISTANCE_MATRIX_API_KEY'])}"
 
-        response = requests.get(url)
+        if waypoints:
+            url += f"&waypoints={'|'.join(waypoints)}"
+
+        response = self._call_maps_api("directions", requests.get, url)
         return response.json()
 
-    def display_route_with_folium(self, origin, destination):
+    def get_travel_details(self, origin, destination):
         route_data = self._get_route_data(origin, destination)
-        route_coordinates = []
 
-        if route_data["status"] == "OK":
-            map_polyline = route_data["routes"][0]["overview_polyline"]["points"]
-            route_coordinates = polyline.decode(map_polyline)
+        if route_data["status"] != "OK":
+            return None
+
+        route = route_data["routes"][0]
+
+        return {
+            "origin": " ".join(origin.split()),
+            "distance": round(
+                sum(leg["distance"]["value"] for leg in route["legs"]) / 1000, 1
+            ),
+            "duration": round(
+                sum(leg["duration"]["value"] for leg in route["legs"]) / 60, 1
+            ),
+            "encoded_polyline": route["overview_polyline"]["points"],
+        }
+
+    def _get_route_coordinates(self, origin, destination, encoded_polyline=None):
+        if encoded_polyline:
+            return decode_polyline(encoded_polyline)
+
+        cache_key = (origin, destination)
+
+        with LocationServices._route_geometry_cache_lock:
+            packed_route = LocationServices._route_geometry_cache.get(cache_key)
+
+            if packed_route is not None:
+                LocationServices._route_geometry_cache.move_to_end(cache_key)
+
+        if packed_route is not None:
+            return unpack_route(packed_route)
+
+        route_data = self._get_route_data(origin, destination)
+
+        if route_data["status"] != "OK":
+            return decode_polyline("")
+
+        route_coordinates = decode_polyline(
+            route_data["routes"][0]["overview_polyline"]["points"]
+        )
+
+        packed_route = pack_route(route_coordinates)
+
+        with LocationServices._route_geometry_cache_lock:
+            LocationServices._route_geometry_cache[cache_key] = packed_route
+            LocationServices._route_geometry_cache.move_to_end(cache_key)
+
+            while len(LocationServices._route_geometry_cache) > self.ROUTE_CACHE_SIZE:
+                LocationServices._route_geometry_cache.popitem(last=False)
+
+        return route_coordinates
+
+    def _get_route_map(self, route_coordinates, zoom_start=13):
+        center = route_coordinates[len(route_coordinates) // 2]
+
+        route_coordinates = simplify_route(
+            route_coordinates, get_tolerance_for_zoom(zoom_start, center[0])
+        )
 
         folium_map = folium.Map(
-            location=route_coordinates[int(len(route_coordinates) / 2)],
+            location=center.tolist(),
             tiles=f"https://mt1.google.com/vt/lyrs=m&x={{x}}&y={{y}}&z={{z}}&key={
                 str(
                     st.secrets['GOOGLE_MAPS_DISTANCE_MATRIX_API_KEY'])}",
             attr='<a href="https://www.google.com/maps/">Google</a>',
-            zoom_start=13,
+            zoom_start=zoom_start,
+        )
+
+        folium.PolyLine(
+            route_coordinates.tolist(), color="#4285F4", weight=5, opacity=1
+        ).add_to(folium_map)
+
+        folium_map.fit_bounds(
+            [
+                route_coordinates.min(axis=0).tolist(),
+                route_coordinates.max(axis=0).tolist(),
+            ]
         )
 
-        folium.PolyLine(route_coordinates, color="#4285F4", weight=5, opacity=1).add_to(
-            folium_map
+        return folium_map
+
+    def display_route_with_folium(
+            self, origin, destination, encoded_polyline=None):
+        route_coordinates = self._get_route_coordinates(
+            origin, destination, encoded_polyline
+        )
+
+        return self._get_route_map(route_coordinates)
+
+    def display_multi_stop_route_with_folium(self, origin, destinations):
+        route_data = self._get_route_data(
+            origin, destinations[-1], waypoints=destinations[:-1]
+        )
+
+        if route_data["status"] != "OK":
+            raise ValueError(
+                f"Directions request for the planned route failed: {route_data['status']}"
+            )
+
+        route_coordinates = decode_polyline(
+            route_data["routes"][0]["overview_polyline"]["points"]
         )
 
-        folium_map.fit_bounds([route_coordinates[0], route_coordinates[-1]])
+        folium_map = self._get_route_map(route_coordinates)
+
+        for stop_number, leg in enumerate(route_data["routes"][0]["legs"], start=1):
+            folium.Marker(
+                location=(
+                    leg["end_location"]["lat"],
+                    leg["end_location"]["lng"],
+                ),
+                tooltip=f"Stop {stop_number}: {leg['end_address']}",
+            ).add_to(folium_map)
 
         return folium_map
 
@@ -49,7 +171,7 @@ class LocationServices:
         url = f"https://api.opencagedata.com/geocode/v1/json?q={zipcode}&key={
             st.secrets['OPENCAGE_GEOCODING_API_KEY']}"
 
-        response = requests.get(url)
+        response = self._call_maps_api("opencage_geocode", requests.get, url)
 
         if response.status_code == 200:
             data = response.json()
@@ -73,7 +195,9 @@ class LocationServices:
             return None, None
 
     def validate_address(self, address):
-        result = self.gmaps.addressvalidation(address)
+        result = self._call_maps_api(
+            "address_validation", self.gmaps.addressvalidation, address
+        )
         # GRANULARITY_UNSPECIFIED, SUB_PREMISE, PREMISE, PREMISE_PROXIMITY, BLOCK, ROUTE
 
         if "result" in result and "verdict" in result["result"]:
@@ -82,15 +206,28 @@ class LocationServices:
 
         return False
 
+    def geocode_address(self, address):
+        geocode_result = self._call_maps_api(
+            "geocode", self.gmaps.geocode, address)
+
+        if not geocode_result:
+            return None
+
+        location = geocode_result[0]["geometry"]["location"]
+        return location["lat"], location["lng"]
+
     def fetch_nearby_districts(self, district_name):
-        geocode_result = self.gmaps.geocode(district_name)
+        geocode_result = self._call_maps_api(
+            "geocode", self.gmaps.geocode, district_name)
 
         location = geocode_result[0]["geometry"]["location"]
 
         latitude = location["lat"]
         longitude = location["lng"]
 
-        nearby_result = self.gmaps.places_nearby(
+        nearby_result = self._call_maps_api(
+            "places_nearby",
+            self.gmaps.places_nearby,
             location=(latitude, longitude),
             radius=50000,
             type="locality",
@@ -99,7 +236,9 @@ class LocationServices:
         nearby_districts = []
 
         for place in nearby_result["results"]:
-            reverse_geocode_result = self.gmaps.reverse_geocode(
+            reverse_geocode_result = self._call_maps_api(
+                "reverse_geocode",
+                self.gmaps.reverse_geocode,
                 (
                     place["geometry"]["location"]["lat"],
                     place["geometry"]["location"]["lng"],
@@ -114,7 +253,9 @@ class LocationServices:
 
     def get_batch_travel_distance_and_time_for_engineers(
             self, origins, destination):
-        result = self.gmaps.distance_matrix(origins, [destination])
+        result = self._call_maps_api(
+            "distance_matrix", self.gmaps.distance_matrix, origins, [destination]
+        )
 
         distances = []
 
@@ -127,8 +268,38 @@ class LocationServices:
 
         return distances
 
+    def get_travel_duration_matrix(self, locations):
+        # Distance Matrix API allows at most 100 elements per request
+        rows_per_request = max(1, 100 // len(locations))
+        duration_matrix = []
+
+        for start in range(0, len(locations), rows_per_request):
+            result = self._call_maps_api(
+                "distance_matrix",
+                self.gmaps.distance_matrix,
+                locations[start: start + rows_per_request],
+                locations,
+                mode="driving",
+            )
+
+            for row in result["rows"]:
+                duration_matrix.append(
+                    [
+                        (
+                            element["duration"]["value"]
+                            if element["status"] == "OK"
+                            else float("inf")
+                        )
+                        for element in row["elements"]
+                    ]
+                )
+
+        return duration_matrix
+
     def get_travel_distance_and_time(self, origin, destination):
-        distance_matrix = self.gmaps.distance_matrix(
+        distance_matrix = self._call_maps_api(
+            "distance_matrix",
+            self.gmaps.distance_matrix,
             origins=origin,
             destinations=destination,
             mode="driving",
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+
+        self.tokens = self.capacity
+        self.updated_on = time.monotonic()
+
+    def _refill(self):
+        current_time = time.monotonic()
+
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (current_time - self.updated_on) * self.rate,
+        )
+        self.updated_on = current_time
+
+    def get_wait_time(self):
+        self._refill()
+
+        if self.tokens >= 1:
+            return 0
+
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class MapsRateLimiter:
+    PRIORITIES = {
+        "assignment": 0,
+        "ui": 1,
+    }
+
+    # Requests per second allowed for each API, kept below the project quotas
+    DEFAULT_BUDGETS = {
+        "directions": 10,
+        "distance_matrix": 10,
+        "geocode": 20,
+        "reverse_geocode": 20,
+        "places_nearby": 5,
+        "address_validation": 5,
+        "opencage_geocode": 1,
+    }
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+
+        self.buckets = {}
+        self.waiting = {}
+        self.metrics = {}
+
+    def _get_bucket(self, api_name):
+        if api_name not in self.buckets:
+            rate = self.budgets.get(api_name, 1)
+
+            self.buckets[api_name] = TokenBucket(rate)
+            self.waiting[api_name] = []
+            self.metrics[api_name] = {
+                "requests": 0,
+                "timeouts": 0,
+                "queue_depth": 0,
+                "max_queue_depth": 0,
+                "total_wait_time": 0.0,
+                "max_wait_time": 0.0,
+                "requests_by_priority": {priority: 0 for priority in self.PRIORITIES},
+            }
+
+        return self.buckets[api_name]
+
+    def acquire(self, api_name, priority="ui", timeout=None):
+        with self.condition:
+            bucket = self._get_bucket(api_name)
+            waiting = self.waiting[api_name]
+            metrics = self.metrics[api_name]
+
+            ticket = (self.PRIORITIES[priority], next(self.sequence))
+            heapq.heappush(waiting, ticket)
+
+            metrics["queue_depth"] = len(waiting)
+            metrics["max_queue_depth"] = max(
+                metrics["max_queue_depth"], len(waiting))
+
+            started_on = time.monotonic()
+
+            while True:
+                wait_time = None
+
+                if waiting[0] == ticket:
+                    wait_time = bucket.get_wait_time()
+
+                    if wait_time == 0:
+                        bucket.consume()
+                        heapq.heappop(waiting)
+                        self.condition.notify_all()
+
+                        waited = time.monotonic() - started_on
+
+                        metrics["requests"] += 1
+                        metrics["requests_by_priority"][priority] += 1
+                        metrics["queue_depth"] = len(waiting)
+                        metrics["total_wait_time"] += waited
+                        metrics["max_wait_time"] = max(
+                            metrics["max_wait_time"], waited)
+
+                        return waited
+
+                if timeout is not None:
+                    remaining_time = timeout - (time.monotonic() - started_on)
+
+                    if remaining_time <= 0:
+                        waiting.remove(ticket)
+                        heapq.heapify(waiting)
+                        self.condition.notify_all()
+
+                        metrics["timeouts"] += 1
+                        metrics["queue_depth"] = len(waiting)
+
+                        raise TimeoutError(
+                            f"Timed out waiting for {api_name} rate limit")
+
+                    wait_time = (
+                        remaining_time
+                        if wait_time is None
+                        else min(wait_time, remaining_time)
+                    )
+
+                self.condition.wait(wait_time)
+
+    def get_metrics(self):
+        with self.condition:
+            metrics = {}
+
+            for api_name, api_metrics in self.metrics.items():
+                metrics[api_name] = dict(api_metrics)
+                metrics[api_name]["requests_by_priority"] = dict(
+                    api_metrics["requests_by_priority"]
+                )
+                metrics[api_name]["average_wait_time"] = (
+                    api_metrics["total_wait_time"] / api_metrics["requests"]
+                    if api_metrics["requests"]
+                    else 0.0
+                )
+
+            return metrics
@@ -0,0 +1,132 @@
+import math
+import struct
+
+import numpy as np
+
+
+POLYLINE_PRECISION = 1e5
+PACKED_ROUTE_HEADER = struct.Struct("<BIii")
+
+# Approximate ground resolution of one map pixel at the equator for zoom 0
+METERS_PER_PIXEL_AT_ZOOM_0 = 156543.03392
+METERS_PER_DEGREE = 111320.0
+
+
+def decode_polyline(encoded_polyline):
+    if not encoded_polyline:
+        return np.empty((0, 2), dtype=np.float64)
+
+    chunks = np.frombuffer(encoded_polyline.encode(
+        "ascii"), dtype=np.uint8).astype(np.int64) - 63
+
+    # A chunk without the continuation bit (0x20) ends the current value
+    value_ends = (chunks & 0x20) == 0
+    value_ids = np.concatenate(([0], np.cumsum(value_ends)[:-1]))
+
+    value_starts = np.flatnonzero(
+        np.concatenate(([True], value_ends[:-1])))
+    chunk_positions = np.arange(len(chunks)) - value_starts[value_ids]
+
+    values = np.zeros(int(value_ends.sum()), dtype=np.int64)
+    np.add.at(values, value_ids, (chunks & 0x1F) << (5 * chunk_positions))
+
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    coordinates = np.cumsum(deltas.reshape(-1, 2), axis=0)
+
+    return coordinates / POLYLINE_PRECISION
+
+
+def simplify_route(coordinates, tolerance):
+    if len(coordinates) < 3 or tolerance <= 0:
+        return coordinates
+
+    keep = np.zeros(len(coordinates), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    segments = [(0, len(coordinates) - 1)]
+
+    while segments:
+        start, end = segments.pop()
+
+        if end - start < 2:
+            continue
+
+        segment_start = coordinates[start]
+        segment_vector = coordinates[end] - segment_start
+        segment_length = np.hypot(*segment_vector)
+
+        offsets = coordinates[start + 1: end] - segment_start
+
+        if segment_length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = (
+                np.abs(
+                    segment_vector[0] * offsets[:, 1]
+                    - segment_vector[1] * offsets[:, 0]
+                )
+                / segment_length
+            )
+
+        farthest = int(np.argmax(distances))
+
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+
+            segments.append((start, split))
+            segments.append((split, end))
+
+    return coordinates[keep]
+
+
+def get_tolerance_for_zoom(zoom, latitude=0, pixel_tolerance=1):
+    meters_per_pixel = (
+        METERS_PER_PIXEL_AT_ZOOM_0 * math.cos(math.radians(latitude)) / 2**zoom
+    )
+
+    return pixel_tolerance * meters_per_pixel / METERS_PER_DEGREE
+
+
+def pack_route(coordinates):
+    fixed_point = np.round(np.asarray(coordinates) *
+                           POLYLINE_PRECISION).astype(np.int64)
+
+    if len(fixed_point) == 0:
+        return PACKED_ROUTE_HEADER.pack(2, 0, 0, 0)
+
+    deltas = np.diff(fixed_point, axis=0)
+
+    # Consecutive route points are close, so deltas usually fit in 16 bits
+    if len(deltas) == 0 or np.abs(deltas).max() < 2**15:
+        dtype_code, deltas = 2, deltas.astype("<i2")
+    else:
+        dtype_code, deltas = 4, deltas.astype("<i4")
+
+    header = PACKED_ROUTE_HEADER.pack(
+        dtype_code, len(fixed_point), int(
+            fixed_point[0][0]), int(fixed_point[0][1])
+    )
+
+    return header + deltas.tobytes()
+
+
+def unpack_route(packed_route):
+    dtype_code, count, first_latitude, first_longitude = (
+        PACKED_ROUTE_HEADER.unpack_from(packed_route)
+    )
+
+    if count == 0:
+        return np.empty((0, 2), dtype=np.float64)
+
+    deltas = np.frombuffer(
+        packed_route,
+        dtype="<i2" if dtype_code == 2 else "<i4",
+        offset=PACKED_ROUTE_HEADER.size,
+    ).reshape(-1, 2)
+
+    fixed_point = np.empty((count, 2), dtype=np.int64)
+    fixed_point[0] = (first_latitude, first_longitude)
+    fixed_point[1:] = deltas
+
+    return np.cumsum(fixed_point, axis=0) / POLYLINE_PRECISION
@@ -0,0 +1,145 @@
+import math
+
+
+class EngineerSpatialIndex:
+    EARTH_RADIUS_KM = 6371.0088
+    KM_PER_DEGREE = 111.32
+
+    def __init__(self, cell_size_km=10):
+        self.cell_size_km = cell_size_km
+        self.cell_size_degrees = cell_size_km / self.KM_PER_DEGREE
+
+        self.grid = {}
+        self.engineers = {}
+        self.skill_bits = {}
+
+    def __len__(self):
+        return len(self.engineers)
+
+    def _get_cell(self, latitude, longitude):
+        return (
+            int(math.floor(latitude / self.cell_size_degrees)),
+            int(math.floor(longitude / self.cell_size_degrees)),
+        )
+
+    def _get_skill_mask(self, skills, specializations, register=False):
+        skill_mask = 0
+
+        tokens = [("skill", str(skill).lower()) for skill in skills or []]
+        tokens += [
+            ("specialization", str(specialization).lower())
+            for specialization in specializations or []
+        ]
+
+        for token in tokens:
+            if token not in self.skill_bits:
+                if not register:
+                    return None
+
+                self.skill_bits[token] = len(self.skill_bits)
+
+            skill_mask |= 1 << self.skill_bits[token]
+
+        return skill_mask
+
+    def _haversine_distance(self, latitude_a, longitude_a, latitude_b, longitude_b):
+        latitude_a, longitude_a = math.radians(latitude_a), math.radians(longitude_a)
+        latitude_b, longitude_b = math.radians(latitude_b), math.radians(longitude_b)
+
+        a = (
+            math.sin((latitude_b - latitude_a) / 2) ** 2
+            + math.cos(latitude_a)
+            * math.cos(latitude_b)
+            * math.sin((longitude_b - longitude_a) / 2) ** 2
+        )
+
+        return 2 * self.EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+    def add_engineer(
+        self, engineer_id, latitude, longitude, skills=None, specializations=None
+    ):
+        if engineer_id in self.engineers:
+            self.remove_engineer(engineer_id)
+
+        cell = self._get_cell(latitude, longitude)
+        skill_mask = self._get_skill_mask(skills, specializations, register=True)
+
+        self.engineers[engineer_id] = (latitude, longitude, skill_mask, cell)
+        self.grid.setdefault(cell, set()).add(engineer_id)
+
+    def remove_engineer(self, engineer_id):
+        engineer = self.engineers.pop(engineer_id, None)
+
+        if engineer is None:
+            return False
+
+        cell_members = self.grid.get(engineer[3])
+        cell_members.discard(engineer_id)
+
+        if not cell_members:
+            del self.grid[engineer[3]]
+
+        return True
+
+    def query_radius(
+        self, latitude, longitude, radius_km, skills=None, specializations=None
+    ):
+        required_mask = self._get_skill_mask(skills, specializations)
+
+        if required_mask is None:
+            return []
+
+        center_row, center_col = self._get_cell(latitude, longitude)
+
+        max_latitude = min(89.0, abs(latitude) +
+                           radius_km / self.KM_PER_DEGREE)
+        cell_width_km = self.cell_size_km * math.cos(math.radians(max_latitude))
+
+        row_span = int(math.ceil(radius_km / self.cell_size_km))
+        col_span = int(math.ceil(radius_km / cell_width_km))
+
+        matches = []
+
+        for row in range(center_row - row_span, center_row + row_span + 1):
+            for col in range(center_col - col_span, center_col + col_span + 1):
+                for engineer_id in self.grid.get((row, col), ()):
+                    (
+                        engineer_latitude,
+                        engineer_longitude,
+                        skill_mask,
+                        _,
+                    ) = self.engineers[engineer_id]
+
+                    if skill_mask & required_mask != required_mask:
+                        continue
+
+                    distance = self._haversine_distance(
+                        latitude, longitude, engineer_latitude, engineer_longitude
+                    )
+
+                    if distance <= radius_km:
+                        matches.append((distance, engineer_id))
+
+        matches.sort()
+        return matches
+
+    def query_nearest(
+        self,
+        latitude,
+        longitude,
+        k,
+        skills=None,
+        specializations=None,
+        max_radius_km=50,
+    ):
+        radius_km = min(self.cell_size_km, max_radius_km)
+
+        while True:
+            matches = self.query_radius(
+                latitude, longitude, radius_km, skills, specializations
+            )
+
+            if len(matches) >= k or radius_km >= max_radius_km:
+                return matches[:k]
+
+            radius_km = min(radius_km * 2, max_radius_km)
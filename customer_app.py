@@ -4,7 +4,6 @@ import requests
 from PIL import Image
 
 import datetime
-import dateutil
 from datetime import timedelta
 
 import streamlit as st
@@ -19,11 +18,16 @@ from backend.channels.email_client import TransactionalEmails
 from backend.channels.sms_client import NotificationSMS
 
 from database.cloud_sql.queries import (
-    Appliances,
     QueryCustomerAppliances,
     QueryCustomers,
     QueryEngineers,
 )
+from database.cloud_sql.async_queries import (
+    AsyncQueryCustomerAppliances,
+    AsyncQueryCustomers,
+    run_queries,
+)
+from database.cloud_sql.catalog import ApplianceCatalog
 from database.cloud_sql.models import ModelCustomerAppliances
 from database.cloud_sql.migrations import MigrateCustomers
 from database.cloud_storage.document_storage import CustomerRecordsBucket
@@ -32,6 +36,7 @@ from database.cloud_storage.multimedia_storage import (
     ProfilePicturesBucket,
 )
 from database.firebase.firestore import OnsiteServiceRequestCollection
+from database.unit_of_work import UnitOfWork
 
 
 st.set_page_config(
@@ -189,9 +194,9 @@ if "customer_details" not in st.session_state:
     st.session_state.customer_details = ""
 
 if "distinct_appliance_data" not in st.session_state:
-    query_appliances = Appliances()
+    appliance_catalog = ApplianceCatalog()
     st.session_state.distinct_appliance_data = (
-        query_appliances.fetch_distinct_appliance_data_with_category()
+        appliance_catalog.fetch_distinct_appliance_data_with_category()
     )
 
 
@@ -332,11 +337,6 @@ def dialog_manage_account():
                     "Profile updated succesfully!",
                     icon=":material/check:")
 
-                try:
-                    get_customer_details.clear()
-                except Exception as error:
-                    pass
-
                 st.session_state.customer_details = None
 
                 try:
@@ -435,11 +435,6 @@ def dialog_manage_account():
                     "Profile updated succesfully!",
                     icon=":material/check:")
 
-                try:
-                    get_customer_details.clear()
-                except Exception as error:
-                    pass
-
                 st.session_state.customer_details = None
 
                 try:
@@ -915,6 +910,17 @@ def register_new_appliance():
                 time.sleep(3)
                 warning_status.empty()
 
+            elif QueryCustomerAppliances().might_serial_number_exist(
+                st.session_state.ra_serial_number
+            ):
+                warning_status = st.warning(
+                    "An appliance with this serial number is already registered",
+                    icon=":material/warning:",
+                )
+
+                time.sleep(3)
+                warning_status.empty()
+
             elif (
                 (st.session_state.ra_purchase_date is None)
                 or (st.session_state.ra_installation_date is None)
@@ -988,43 +994,49 @@ def register_new_appliance():
                     uploaded_purchase_invoice_to_bucket
                     and uploaded_warranty_certificate_to_bucket
                 ):
-                    query_appliances = Appliances()
                     model_customer_appliances = ModelCustomerAppliances()
 
                     try:
-                        warranty_period_in_months, appliance_image_gcs_url = (
-                            query_appliances.fetch_warranty_period_and_appliance_image_url_by_brand_sub_category_and_model_number(
-                                brand=st.session_state.ra_brand,
-                                sub_category=st.session_state.ra_sub_category,
-                                model_number=st.session_state.ra_model_number,
-                            )
-                        )
-
-                        warranty_expiration_date = (
-                            st.session_state.ra_installation_date
-                            + dateutil.relativedelta.relativedelta(
-                                months=int(warranty_period_in_months)
-                            )
-                        ).strftime("%Y-%m-%d")
-
-                        store_customer_appliance_details_to_cloudsql = (
-                            model_customer_appliances.add_customer_appliance(
+                        registered_customer_appliance = (
+                            model_customer_appliances.register_customer_appliance(
                                 customer_id=st.session_state.customer_id,
-                                category=st.session_state.ra_category,
                                 sub_category=st.session_state.ra_sub_category,
                                 brand=st.session_state.ra_brand,
                                 model_number=st.session_state.ra_model_number,
                                 serial_number=st.session_state.ra_serial_number,
                                 purchase_date=st.session_state.ra_purchase_date,
-                                warranty_period=warranty_period_in_months,
-                                warranty_expiration=warranty_expiration_date,
                                 purchased_from=st.session_state.ra_purchased_from,
                                 seller=st.session_state.ra_seller,
                                 installation_date=st.session_state.ra_installation_date,
-                                appliance_image_url=appliance_image_gcs_url,
                             )
                         )
 
+                        if not registered_customer_appliance:
+                            raise ValueError("Appliance registration failed")
+
+                        # Newest first, matching fetch_customer_appliance_data_by_customer_id
+                        if "customer_appliances" in st.session_state:
+                            st.session_state.customer_appliances = {
+                                registered_customer_appliance["serial_number"]: {
+                                    column: registered_customer_appliance[column]
+                                    for column in (
+                                        "category",
+                                        "sub_category",
+                                        "brand",
+                                        "model_number",
+                                        "serial_number",
+                                        "purchased_from",
+                                        "seller",
+                                        "purchase_date",
+                                        "installation_date",
+                                        "warranty_period",
+                                        "warranty_expiration",
+                                        "appliance_image_url",
+                                    )
+                                },
+                                **st.session_state.customer_appliances,
+                            }
+
                         progress_bar.progress(
                             100, "Your appliance has been registered."
                         )
@@ -1033,12 +1045,6 @@ def register_new_appliance():
                         flag_appliance_registration_status = False
 
                 if flag_appliance_registration_status == True:
-                    try:
-                        fetch_and_cache_customer_appliance_details.clear()
-
-                    except Exception as error:
-                        pass
-
                     del st.session_state.ra_sub_category
                     del st.session_state.ra_brand
                     del st.session_state.ra_model_number
@@ -1142,6 +1148,36 @@ def view_customer_appliance_details(appliance_details):
             )
 
 
+def request_engineer_assignment(
+    assignment_service_url,
+    customer_id,
+    service_request_id,
+    onsite_service_request_collection,
+):
+    try:
+        response = requests.post(
+            assignment_service_url,
+            json={
+                "customer_id": customer_id,
+                "request_id": str(service_request_id),
+            },
+        )
+        is_assigned = response.status_code == 200
+
+    except Exception as error:
+        is_assigned = False
+
+    # Unreachable or failing assignment service, hand the request to admin
+    if not is_assigned:
+        return onsite_service_request_collection.update_engineer_for_service_request(
+            customer_id,
+            service_request_id,
+            "ADMIN",
+        )
+
+    return True
+
+
 @st.dialog("Create New Onsite Service Request", width="large")
 def create_new_onsite_service_request():
     step_register_service_request = sac.steps(
@@ -1152,7 +1188,6 @@ def create_new_onsite_service_request():
     )
     st.markdown(" ", unsafe_allow_html=True)
 
-    @st.cache_data(show_spinner=False)
     def fetch_and_cache_customer_appliance_serials(cache=True):
         query_customer_appliances = QueryCustomerAppliances()
 
@@ -1364,121 +1399,119 @@ def create_new_onsite_service_request():
                 progress_bar = st.progress(
                     0, text="Preparing to process your request")
                 query_customer_appliances = QueryCustomerAppliances()
+                onsite_service_request_collection = OnsiteServiceRequestCollection()
 
                 progress_bar.progress(20, "Validating customer information")
 
-                appliance_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
-                    customer_id=st.session_state.customer_id,
-                    serial_number=st.session_state.cosr_serial_number,
-                )
-                progress_bar.progress(40, "Verifying service request details")
-
-                service_request_data = {
-                    "city": st.session_state.cosr_address_city,
-                    "state": st.session_state.cosr_address_state,
-                    "street": st.session_state.cosr_address_street,
-                    "zipcode": st.session_state.cosr_address_zipcode,
-                    "category": appliance_details["category"],
-                    "sub_category": appliance_details["sub_category"],
-                    "brand": appliance_details["brand"],
-                    "model_number": appliance_details["model_number"],
-                    "serial_number": appliance_details["serial_number"],
-                    "purchased_from": appliance_details["purchased_from"],
-                    "seller": appliance_details["seller"],
-                    "purchase_date": appliance_details["purchase_date"].strftime(
-                        "%Y-%m-%d"
-                    ),
-                    "installation_date": appliance_details[
-                        "installation_date"
-                    ].strftime("%Y-%m-%d"),
-                    "warranty_period": appliance_details["warranty_period"],
-                    "warranty_expiration": appliance_details[
-                        "warranty_expiration"
-                    ].strftime("%Y-%m-%d"),
-                    "appliance_image_url": appliance_details["appliance_image_url"],
-                    "phone_number": st.session_state.cosr_phone_number,
-                    "email": st.session_state.cosr_email,
-                    "description": st.session_state.cosr_request_description,
-                    "request_title": st.session_state.cosr_request_title,
-                    "request_type": st.session_state.cosr_service_category,
-                }
-
-                onsite_service_request_collection_firestore = (
-                    OnsiteServiceRequestCollection()
-                )
+                # One SQL connection and one Firestore batch for the whole request,
+                # notifications and uploads only go out once both have committed
+                with UnitOfWork(
+                    firestore_client=onsite_service_request_collection.db
+                ) as unit_of_work:
+                    appliance_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
+                        customer_id=st.session_state.customer_id,
+                        serial_number=st.session_state.cosr_serial_number,
+                        db_conn=unit_of_work.db_conn,
+                    )
+                    progress_bar.progress(40, "Verifying service request details")
+
+                    service_request_data = {
+                        "city": st.session_state.cosr_address_city,
+                        "state": st.session_state.cosr_address_state,
+                        "street": st.session_state.cosr_address_street,
+                        "zipcode": st.session_state.cosr_address_zipcode,
+                        "category": appliance_details["category"],
+                        "sub_category": appliance_details["sub_category"],
+                        "brand": appliance_details["brand"],
+                        "model_number": appliance_details["model_number"],
+                        "serial_number": appliance_details["serial_number"],
+                        "purchased_from": appliance_details["purchased_from"],
+                        "seller": appliance_details["seller"],
+                        "purchase_date": appliance_details["purchase_date"].strftime(
+                            "%Y-%m-%d"
+                        ),
+                        "installation_date": appliance_details[
+                            "installation_date"
+                        ].strftime("%Y-%m-%d"),
+                        "warranty_period": appliance_details["warranty_period"],
+                        "warranty_expiration": appliance_details[
+                            "warranty_expiration"
+                        ].strftime("%Y-%m-%d"),
+                        "appliance_image_url": appliance_details["appliance_image_url"],
+                        "phone_number": st.session_state.cosr_phone_number,
+                        "email": st.session_state.cosr_email,
+                        "description": st.session_state.cosr_request_description,
+                        "request_title": st.session_state.cosr_request_title,
+                        "request_type": st.session_state.cosr_service_category,
+                    }
+
+                    service_request_id = onsite_service_request_collection.create_onsite_service_request(
+                        customer_id=st.session_state.customer_id,
+                        service_request_data=service_request_data,
+                        batch=unit_of_work.firestore_batch,
+                    )
 
-                service_request_id = onsite_service_request_collection_firestore.create_onsite_service_request(
-                    customer_id=st.session_state.customer_id,
-                    service_request_data=service_request_data,
-                )
+                    attachment_uploads = []
 
-                progress_bar.progress(
-                    60, "Updating our system with your request")
-
-                try:
                     if cosr_attachments:
                         onsite_service_requests_bucket = OnsiteServiceRequestsBucket()
 
                         for attachment in cosr_attachments:
-                            onsite_service_requests_bucket.upload_customer_attachment(
-                                request_id=service_request_id,
-                                image_file=attachment,
-                                image_filename=attachment.name,
+                            attachment_uploads.append(
+                                unit_of_work.after_commit(
+                                    onsite_service_requests_bucket.upload_customer_attachment,
+                                    request_id=service_request_id,
+                                    image_file=attachment,
+                                    image_filename=attachment.name,
+                                )
                             )
 
-                        progress_bar.progress(
-                            80, "Finalizing your service request")
+                    unit_of_work.after_commit(
+                        request_engineer_assignment,
+                        assignment_service_url=str(
+                            st.secrets["URL_CLOUD_RUN_ONSITE_ENGINEER_ASSIGNMENT_SERVICE"]
+                        ),
+                        customer_id=str(st.session_state.customer_id),
+                        service_request_id=service_request_id,
+                        onsite_service_request_collection=onsite_service_request_collection,
+                    )
 
-                except Exception as error:
-                    st.warning(
-                        "Uh-oh! Could not save the attachments.", icon="⚠️")
-                    time.sleep(2)
+                    try:
+                        transaction_email_channel = TransactionalEmails()
 
-                engineer_assignment_cloud_run_payload = {
-                    "customer_id": str(st.session_state.customer_id),
-                    "request_id": str(service_request_id),
-                }
+                        unit_of_work.after_commit(
+                            transaction_email_channel.send_onsite_service_request_confirmation_mail,
+                            receiver_full_name=st.session_state.customer_name,
+                            receiver_email=st.session_state.cosr_email,
+                            service_request_id=service_request_id,
+                        )
 
-                response = requests.post(
-                    str(st.secrets["URL_CLOUD_RUN_ONSITE_ENGINEER_ASSIGNMENT_SERVICE"]),
-                    json=engineer_assignment_cloud_run_payload,
-                )
+                    except Exception as error:
+                        pass
 
-                if response.status_code != 200:
                     try:
-                        onsite_service_request_collection = (
-                            OnsiteServiceRequestCollection()
-                        )
-                        onsite_service_request_collection.update_engineer_for_service_request(
-                            str(st.session_state.customer_id),
-                            service_request_id,
-                            "ADMIN",
+                        notification_sms_channel = NotificationSMS()
+
+                        unit_of_work.after_commit(
+                            notification_sms_channel.send_onsite_service_request_confirmation_sms,
+                            receivers_phone_number=st.session_state.cosr_phone_number,
+                            service_request_id=service_request_id,
                         )
+
                     except Exception as error:
                         pass
 
-                try:
-                    transaction_email_channel = TransactionalEmails()
-
-                    transaction_email_channel.send_onsite_service_request_confirmation_mail(
-                        receiver_full_name=st.session_state.customer_name,
-                        receiver_email=st.session_state.st.session_state.cosr_email,
-                        service_request_id=service_request_id,
-                    )
+                    progress_bar.progress(
+                        60, "Updating our system with your request")
 
-                except Exception as error:
-                    pass
+                    side_effect_results = unit_of_work.commit()
 
-                try:
-                    notification_sms_channel = NotificationSMS()
+                progress_bar.progress(80, "Finalizing your service request")
 
-                    notification_sms_channel.send_onsite_service_request_confirmation_sms(
-                        receivers_phone_number=st.session_state.cosr_phone_number,
-                        service_request_id=service_request_id,
-                    )
-
-                except Exception as error:
-                    pass
+                if not all(side_effect_results[idx] for idx in attachment_uploads):
+                    st.warning(
+                        "Uh-oh! Could not save the attachments.", icon="⚠️")
+                    time.sleep(2)
 
                 st.session_state.cosr_serial_number = None
                 st.session_state.cosr_service_category = None
@@ -1525,7 +1558,6 @@ def view_service_request_details(service_request_id, service_request_details):
     if service_request_details.get("assignment_status").lower() == "confirmed":
         assigned_to_engineer_id = service_request_details.get("assigned_to")
 
-        @st.cache_data(show_spinner=False)
         def get_engineer_name(assigned_to_engineer_id):
             query_engineers = QueryEngineers()
             engineer_name_details = query_engineers.fetch_engineer_details_by_id(
@@ -1945,7 +1977,6 @@ def get_greetings(is_ist):
     return greeting
 
 
-@st.cache_data(show_spinner=False)
 def get_customer_details(full_name=True):
     query_customers = QueryCustomers()
 
@@ -2031,17 +2062,24 @@ if __name__ == "__main__":
 
     if st.session_state.customer_id:
         greeting = get_greetings(is_ist=True)
-        customer_name = get_customer_details(full_name=False)
 
         if "customer_appliances" not in st.session_state:
-            query_customer_appliances = QueryCustomerAppliances()
-            st.session_state.customer_appliances = (
-                query_customer_appliances.fetch_customer_appliance_data_by_customer_id(
+            # Independent lookups, overlap them instead of running back to back
+            (
+                st.session_state.customer_details,
+                st.session_state.customer_appliances,
+            ) = run_queries(
+                AsyncQueryCustomers().fetch_customer_details_by_username(
+                    st.session_state.customer_id,
+                ),
+                AsyncQueryCustomerAppliances().fetch_customer_appliance_data_by_customer_id(
                     customer_id=st.session_state.customer_id,
                     limit=-1,
-                )
+                ),
             )
 
+        customer_name = get_customer_details(full_name=False)
+
         with st.sidebar:
             selected_menu_item = sac.menu(
                 [
@@ -2176,96 +2214,34 @@ if __name__ == "__main__":
 
             query_customer_appliances = QueryCustomerAppliances()
 
-            @st.cache_data(show_spinner=False)
             def fetch_and_cache_customer_appliance_details(cache=True):
                 try:
-                    st.session_state.recent_appliance_serial_numbers = list(
-                        st.session_state.customer_appliances.keys()
-                    )
+                    recent_customer_appliances = list(
+                        st.session_state.customer_appliances.values()
+                    )[:4]
 
                 except Exception as error:
-                    pass
-
-                    try:
-                        st.session_state.recent_appliance_serial_numbers = query_customer_appliances.fetch_appliance_serial_numbers_by_customer_id(
-                            customer_id=st.session_state.customer_id,
-                            limit=-1,
-                        )
-                    except Exception as error:
-                        pass
-
-                if len(st.session_state.recent_appliance_serial_numbers) > 0:
-                    try:
-                        st.session_state.customer_appliance_1_details = (
-                            st.session_state.customer_appliances.get(
-                                st.session_state.recent_appliance_serial_numbers[0]
-                            )
-                        )
-
-                    except Exception as error:
-                        pass
-
-                        try:
-                            st.session_state.customer_appliance_1_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
-                                st.session_state.customer_id,
-                                st.session_state.recent_appliance_serial_numbers[0],
-                            )
-                        except Exception as error:
-                            pass
-
-                if len(st.session_state.recent_appliance_serial_numbers) > 1:
-                    try:
-                        st.session_state.customer_appliance_2_details = (
-                            st.session_state.customer_appliances.get(
-                                st.session_state.recent_appliance_serial_numbers[1]
-                            )
-                        )
-
-                    except Exception as error:
-                        pass
-
-                        try:
-                            st.session_state.customer_appliance_2_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
-                                st.session_state.customer_id,
-                                st.session_state.recent_appliance_serial_numbers[1],
-                            )
-                        except Exception as error:
-                            pass
-
-                if len(st.session_state.recent_appliance_serial_numbers) > 2:
                     try:
-                        st.session_state.customer_appliance_3_details = (
-                            st.session_state.customer_appliances.get(
-                                st.session_state.recent_appliance_serial_numbers[2]
+                        recent_customer_appliances, _ = (
+                            query_customer_appliances.fetch_customer_appliances_page(
+                                customer_id=st.session_state.customer_id,
+                                limit=4,
                             )
                         )
-
                     except Exception as error:
-                        try:
-                            st.session_state.customer_appliance_3_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
-                                st.session_state.customer_id,
-                                st.session_state.recent_appliance_serial_numbers[2],
-                            )
+                        recent_customer_appliances = []
 
-                        except Exception as error:
-                            pass
+                st.session_state.recent_appliance_serial_numbers = [
+                    appliance_details["serial_number"]
+                    for appliance_details in recent_customer_appliances
+                ]
 
-                if len(st.session_state.recent_appliance_serial_numbers) > 3:
-                    try:
-                        st.session_state.customer_appliance_4_details = (
-                            st.session_state.customer_appliances.get(
-                                st.session_state.recent_appliance_serial_numbers[3]
-                            )
-                        )
-
-                    except Exception as error:
-                        try:
-                            st.session_state.customer_appliance_4_details = query_customer_appliances.fetch_customer_appliance_details_by_customer_id_serial_number(
-                                st.session_state.customer_id,
-                                st.session_state.recent_appliance_serial_numbers[3],
-                            )
-                        except Exception as error:
-                            pass
+                for idx, appliance_details in enumerate(
+                    recent_customer_appliances, start=1
+                ):
+                    st.session_state[f"customer_appliance_{idx}_details"] = (
+                        appliance_details
+                    )
 
             fetch_and_cache_customer_appliance_details(cache=True)
 
@@ -2709,139 +2685,29 @@ if __name__ == "__main__":
 
             col1, col2, col3, col4 = st.columns(4)
 
-            @st.cache_data(show_spinner=False)
-            def fetch_and_cache_best_appliances_by_energy_rating(cache=True):
-                query_appliances = Appliances()
-
-                st.session_state.best_appliancs_by_energy_rating = (
-                    query_appliances.fetch_best_appliances_by_energy_rating(
-                        count=4)
-                )
-
-            fetch_and_cache_best_appliances_by_energy_rating(cache=True)
-
-            if st.session_state.best_appliancs_by_energy_rating:
-                appliance_1, appliance_2, appliance_3, appliance_4 = (
-                    st.session_state.best_appliancs_by_energy_rating
-                )
-
-                with col1:
-                    with stylable_container(
-                        key="featured_container_with_border_1",
-                        css_styles=f"""
-                            {{
-                                background-color: {st.session_state.themes[st.session_state.themes["current_theme"]]["containerColor"]};
-                                border: 1px solid {st.session_state.themes[st.session_state.themes["current_theme"]]["containerBoundaryColor"]};
-                                border-radius: 0.6rem;
-                                padding: calc(1em - 1px)
-                            }}
-                        """,
-                    ):
-                        with st.container(border=False):
-                            st.image(appliance_2[3], use_container_width=True)
-
-                            appliance_name = (
-                                appliance_2[2]
-                                + " "
-                                + appliance_2[0].replace("Countertop ", "")
-                            )
-
-                            st.markdown(
-                                f"""
-                                <P><B>{appliance_name}</B><BR>
-                                Model No.: {appliance_2[1]}</P>
-                                """,
-                                unsafe_allow_html=True,
-                            )
-
-                            if st.button(
-                                "Visit Marketplace",
-                                use_container_width=True,
-                                icon=":material/store:",
-                                key="_buy_appliance_2",
-                            ):
-                                st.toast(
-                                    "Marketplace is currently unavailable")
-
-                with col2:
-                    with stylable_container(
-                        key="featured_container_with_border_2",
-                        css_styles=f"""
-                            {{
-                                background-color: {st.session_state.themes[st.session_state.themes["current_theme"]]["containerColor"]};
-                                border: 1px solid {st.session_state.themes[st.session_state.themes["current_theme"]]["containerBoundaryColor"]};
-                                border-radius: 0.6rem;
-                                padding: calc(1em - 1px)
-                            }}
-                        """,
-                    ):
-                        with st.container(border=False):
-                            st.image(appliance_1[3], use_container_width=True)
-
-                            appliance_name = (
-                                appliance_1[2]
-                                + " "
-                                + appliance_1[0].replace("Countertop ", "")
-                            )
-
-                            st.markdown(
-                                f"""
-                                <P><B>{appliance_name}</B><BR>
-                                Model No.: {appliance_1[1]}</P>
-                                """,
-                                unsafe_allow_html=True,
-                            )
-
-                            if st.button(
-                                "Visit Marketplace",
-                                use_container_width=True,
-                                icon=":material/store:",
-                                key="_buy_appliance_1",
-                            ):
-                                st.toast(
-                                    "Marketplace is currently unavailable")
-
-                with col3:
-                    with stylable_container(
-                        key="featured_container_with_border_3",
-                        css_styles=f"""
-                            {{
-                                background-color: {st.session_state.themes[st.session_state.themes["current_theme"]]["containerColor"]};
-                                border: 1px solid {st.session_state.themes[st.session_state.themes["current_theme"]]["containerBoundaryColor"]};
-                                border-radius: 0.6rem;
-                                padding: calc(1em - 1px)
-                            }}
-                        """,
-                    ):
-                        with st.container(border=False):
-                            st.image(appliance_3[3], use_container_width=True)
+            appliance_catalog = ApplianceCatalog()
 
-                            appliance_name = (
-                                appliance_3[2]
-                                + " "
-                                + appliance_3[0].replace("Countertop ", "")
-                            )
+            st.session_state.best_appliancs_by_energy_rating = (
+                appliance_catalog.fetch_best_appliances_by_energy_rating(count=4)
+            )
 
-                            st.markdown(
-                                f"""
-                                <P><B>{appliance_name}</B><BR>
-                                Model No.: {appliance_3[1]}</P>
-                                """,
-                                unsafe_allow_html=True,
-                            )
+            best_appliances = st.session_state.best_appliancs_by_energy_rating
 
-                            if st.button(
-                                "Visit Marketplace",
-                                use_container_width=True,
-                                icon=":material/store:",
-                                key="_buy_appliance_3",
-                            ):
-                                st.toast(
-                                    "Marketplace is currently unavailable")
+            # The top rated appliance goes in the second column, the rest fill
+            # the remaining columns in rating order
+            for column, appliance_number in zip(
+                (col1, col2, col3, col4),
+                [
+                    appliance_number
+                    for appliance_number in (2, 1, 3, 4)
+                    if appliance_number <= len(best_appliances)
+                ],
+            ):
+                appliance = best_appliances[appliance_number - 1]
 
-                with col4:
+                with column:
                     with stylable_container(
-                        key="featured_container_with_border_4",
+                        key=f"featured_container_with_border_{appliance_number}",
                         css_styles=f"""
                             {{
                                 background-color: {st.session_state.themes[st.session_state.themes["current_theme"]]["containerColor"]};
@@ -2852,18 +2718,18 @@ if __name__ == "__main__":
                         """,
                     ):
                         with st.container(border=False):
-                            st.image(appliance_4[3], use_container_width=True)
+                            st.image(appliance[3], use_container_width=True)
 
                             appliance_name = (
-                                appliance_4[2]
+                                appliance[2]
                                 + " "
-                                + appliance_4[0].replace("Countertop ", "")
+                                + appliance[0].replace("Countertop ", "")
                             )
 
                             st.markdown(
                                 f"""
                                 <P><B>{appliance_name}</B><BR>
-                                Model No.: {appliance_4[1]}</P>
+                                Model No.: {appliance[1]}</P>
                                 """,
                                 unsafe_allow_html=True,
                             )
@@ -2872,7 +2738,7 @@ if __name__ == "__main__":
                                 "Visit Marketplace",
                                 use_container_width=True,
                                 icon=":material/store:",
-                                key="_buy_appliance_4",
+                                key=f"_buy_appliance_{appliance_number}",
                             ):
                                 st.toast(
                                     "Marketplace is currently unavailable")
@@ -0,0 +1,381 @@
+import os
+import json
+import uuid
+import datetime
+import sqlalchemy
+
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from database.cloud_sql.backend import get_engine
+from database.cloud_sql.query_registry import QueryRegistry
+
+
+# Projected columns and their Arrow types. Contact details and names are
+# left out, analytics only needs identifiers, location and activity data.
+EXPORT_TABLES = {
+    "appliances": {
+        "primary_key": "appliance_id",
+        "watermark_column": "created_at",
+        "columns": {
+            "appliance_id": pa.int64(),
+            "model_number": pa.string(),
+            "appliance_name": pa.string(),
+            "brand": pa.string(),
+            "category": pa.string(),
+            "sub_category": pa.string(),
+            "warranty_period": pa.int32(),
+            "launch_date": pa.date32(),
+            "energy_rating": pa.int8(),
+            "availability_status": pa.string(),
+            "created_at": pa.timestamp("s"),
+        },
+    },
+    "customer_appliances": {
+        "primary_key": "customer_appliance_id",
+        "watermark_column": "created_on",
+        "columns": {
+            "customer_appliance_id": pa.int64(),
+            "customer_id": pa.string(),
+            "category": pa.string(),
+            "sub_category": pa.string(),
+            "brand": pa.string(),
+            "model_number": pa.string(),
+            "purchase_date": pa.date32(),
+            "warranty_period": pa.int32(),
+            "warranty_expiration": pa.date32(),
+            "purchased_from": pa.string(),
+            "installation_date": pa.date32(),
+            "status": pa.string(),
+            "created_on": pa.timestamp("s"),
+        },
+    },
+    "customers": {
+        "primary_key": "username",
+        "watermark_column": "created_at",
+        "columns": {
+            "username": pa.string(),
+            "gender": pa.string(),
+            "district": pa.string(),
+            "city": pa.string(),
+            "state": pa.string(),
+            "country": pa.string(),
+            "zip_code": pa.string(),
+            "created_at": pa.timestamp("s"),
+        },
+    },
+    "engineers": {
+        "primary_key": "engineer_id",
+        "watermark_column": "created_on",
+        "columns": {
+            "engineer_id": pa.string(),
+            "availability": pa.bool_(),
+            "active_tickets": pa.int32(),
+            "city": pa.string(),
+            "district": pa.string(),
+            "state": pa.string(),
+            "country": pa.string(),
+            "specializations": pa.string(),
+            "skills": pa.string(),
+            "rating": pa.float64(),
+            "reward_points": pa.int32(),
+            "language_proficiency": pa.string(),
+            "created_on": pa.timestamp("s"),
+        },
+    },
+}
+
+
+# Rows can commit after rows with a later timestamp (or the same second and
+# a smaller key), each run re-reads this window and skips keys it has seen
+WATERMARK_OVERLAP_SECONDS = 300
+
+
+def _format_watermark(value):
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class AnalyticsExport:
+    def __init__(self, export_directory="exports", batch_size=10000):
+        self.export_directory = export_directory
+        self.batch_size = batch_size
+        self.state_file_path = os.path.join(
+            export_directory, "_watermarks.json")
+
+    def _load_watermarks(self):
+        try:
+            with open(self.state_file_path, "r") as state_file:
+                return json.load(state_file)
+
+        except FileNotFoundError:
+            return {}
+
+    def _save_watermarks(self, watermarks):
+        os.makedirs(self.export_directory, exist_ok=True)
+        temporary_path = f"{self.state_file_path}.tmp"
+
+        with open(temporary_path, "w") as state_file:
+            json.dump(watermarks, state_file, indent=2)
+
+        # Replace in one step so a failed run never leaves a partial state file
+        os.replace(temporary_path, self.state_file_path)
+
+    def _get_batch_query(self, table_name, columns, batch_position):
+        export_table = EXPORT_TABLES[table_name]
+        primary_key = export_table["primary_key"]
+        watermark_column = export_table["watermark_column"]
+
+        QueryRegistry.validate_columns(table_name, columns)
+
+        query = f"SELECT {', '.join(columns)} FROM {table_name}"
+
+        # Both forms are range scans on the (watermark, primary key) indexes
+        # added by schema migration 6. MySQL does not range scan a row value
+        # comparison, the seek is spelled out so the leading bound is usable
+        if batch_position == "next":
+            query += f"""
+                WHERE {watermark_column} >= :watermark
+                AND ({watermark_column} > :watermark OR {primary_key} > :last_key)
+                """
+        elif batch_position == "overlap":
+            query += f" WHERE {watermark_column} >= :overlap_start"
+        else:
+            query += f" WHERE {watermark_column} IS NOT NULL"
+
+        query += f" ORDER BY {watermark_column}, {primary_key} LIMIT :batch_size"
+
+        return sqlalchemy.text(query)
+
+    def _stream_batches(self, table_name, columns, watermark):
+        export_table = EXPORT_TABLES[table_name]
+        primary_key_idx = columns.index(export_table["primary_key"])
+        watermark_idx = columns.index(export_table["watermark_column"])
+
+        first_batch_query = self._get_batch_query(
+            table_name, columns, "first" if watermark is None else "overlap"
+        )
+        next_batch_query = self._get_batch_query(table_name, columns, "next")
+
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = first_batch_query
+            parameters = {"batch_size": self.batch_size}
+
+            if watermark is not None:
+                parameters["overlap_start"] = _format_watermark(
+                    datetime.datetime.fromisoformat(watermark["watermark"])
+                    - datetime.timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+                )
+
+            while True:
+                rows = db_conn.execute(query, parameters=parameters).fetchall()
+
+                if not rows:
+                    break
+
+                yield rows
+
+                if len(rows) < self.batch_size:
+                    break
+
+                query = next_batch_query
+                parameters = {
+                    "watermark": _format_watermark(rows[-1][watermark_idx]),
+                    "last_key": rows[-1][primary_key_idx],
+                    "batch_size": self.batch_size,
+                }
+
+    def _to_record_batch(self, rows, schema):
+        arrays = []
+
+        for idx, field in enumerate(schema):
+            array = pa.array([row[idx] for row in rows])
+
+            # SQLite hands dates back as text, let Arrow parse them
+            if array.type != field.type:
+                array = array.cast(field.type)
+
+            arrays.append(array)
+
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def export_table(self, table_name, columns=None, watermarks=None):
+        export_table = EXPORT_TABLES[table_name]
+
+        columns = list(columns or export_table["columns"])
+
+        for required_column in (
+            export_table["primary_key"],
+            export_table["watermark_column"],
+        ):
+            if required_column not in columns:
+                columns.append(required_column)
+
+        schema = pa.schema(
+            [(column, export_table["columns"][column]) for column in columns]
+        )
+
+        if watermarks is None:
+            watermarks = self._load_watermarks()
+
+        watermark = watermarks.get(table_name)
+        watermark_idx = columns.index(export_table["watermark_column"])
+        primary_key_idx = columns.index(export_table["primary_key"])
+
+        run_timestamp = datetime.datetime.now(datetime.timezone.utc)
+        run_id = f"{run_timestamp.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        # Keys exported inside the overlap window in watermark order, re-read
+        # rows matching them are skipped
+        recent_keys = OrderedDict()
+        exported_before = None
+
+        if watermark is not None:
+            if "recent_keys" in watermark:
+                recent_keys = OrderedDict(watermark["recent_keys"])
+            else:
+                # State saved before the overlap window existed, everything up
+                # to the old keyset position has been exported
+                exported_before = (
+                    _format_watermark(watermark["watermark"]),
+                    watermark["last_key"],
+                )
+
+        writers = {}
+        exported_count = 0
+        last_row = None
+
+        try:
+            for rows in self._stream_batches(table_name, columns, watermark):
+                last_row = rows[-1]
+                new_rows = []
+
+                for row in rows:
+                    key = row[primary_key_idx]
+                    row_watermark = _format_watermark(row[watermark_idx])
+
+                    if key in recent_keys or (
+                        exported_before is not None
+                        and (row_watermark, key) <= exported_before
+                    ):
+                        continue
+
+                    recent_keys[key] = row_watermark
+                    new_rows.append(row)
+
+                # Rows arrive in watermark order, keys older than the window
+                # behind this batch can neither repeat nor be needed next run
+                window_start = _format_watermark(
+                    datetime.datetime.fromisoformat(
+                        _format_watermark(last_row[watermark_idx]))
+                    - datetime.timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+                )
+
+                while recent_keys and next(iter(recent_keys.values())) < window_start:
+                    recent_keys.popitem(last=False)
+
+                if not new_rows:
+                    continue
+
+                rows = new_rows
+                record_batch = self._to_record_batch(rows, schema)
+
+                # Hive style partitions by creation month keep incremental runs apart
+                created_months = pc.strftime(
+                    record_batch.column(watermark_idx), format="%Y-%m"
+                ).to_pylist()
+
+                for created_month in dict.fromkeys(created_months):
+                    writer = writers.get(created_month)
+
+                    if writer is None:
+                        partition_directory = os.path.join(
+                            self.export_directory,
+                            table_name,
+                            f"created_month={created_month}",
+                        )
+                        os.makedirs(partition_directory, exist_ok=True)
+
+                        # Files stay hidden under a .tmp suffix until the run succeeds
+                        writer = pq.ParquetWriter(
+                            os.path.join(
+                                partition_directory, f"part-{run_id}.parquet.tmp"
+                            ),
+                            schema,
+                            compression="zstd",
+                        )
+                        writers[created_month] = writer
+
+                    writer.write_batch(
+                        record_batch.filter(
+                            pa.array(
+                                [month == created_month for month in created_months])
+                        )
+                    )
+
+                exported_count += len(rows)
+
+        except Exception:
+            for writer in writers.values():
+                writer.close()
+                os.remove(writer.where)
+
+            raise
+
+        for writer in writers.values():
+            writer.close()
+            os.replace(writer.where, writer.where[: -len(".tmp")])
+
+        if last_row is not None:
+            last_watermark = _format_watermark(last_row[watermark_idx])
+
+            if watermark is not None:
+                last_watermark = max(
+                    last_watermark, _format_watermark(watermark["watermark"])
+                )
+
+            overlap_start = _format_watermark(
+                datetime.datetime.fromisoformat(last_watermark)
+                - datetime.timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+            )
+
+            watermarks[table_name] = {
+                "watermark": last_watermark,
+                "last_key": last_row[primary_key_idx],
+                "recent_keys": [
+                    [key, key_watermark]
+                    for key, key_watermark in recent_keys.items()
+                    if key_watermark >= overlap_start
+                ],
+            }
+
+        return exported_count
+
+    def export_all_tables(self, table_names=None):
+        watermarks = self._load_watermarks()
+        exported_counts = {}
+
+        for table_name in table_names or EXPORT_TABLES:
+            exported_counts[table_name] = self.export_table(
+                table_name, watermarks=watermarks
+            )
+
+            # Advance each table's watermark as soon as its files are closed
+            self._save_watermarks(watermarks)
+
+        return exported_counts
+
+
+if __name__ == "__main__":
+    analytics_export = AnalyticsExport()
+    exported_counts = analytics_export.export_all_tables()
+
+    for table_name, exported_count in exported_counts.items():
+        print(f"Exported {exported_count} new rows from {table_name}")
@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from database.cloud_sql.queries import (
+    Appliances,
+    QueryCustomerAppliances,
+    QueryCustomers,
+    QueryEngineers,
+    QueryServiceGuides,
+)
+
+
+MAX_QUERY_WORKERS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_QUERY_WORKERS,
+                    thread_name_prefix="cloud_sql_query",
+                )
+
+    return _executor
+
+
+class _AsyncQuery:
+    query_class = None
+
+    def __init__(self, executor=None):
+        self._query = self.query_class()
+        self._executor = executor or _get_executor()
+
+    async def _run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self._executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def _stream(self, function, *args, **kwargs):
+        rows = await self._run(function, *args, **kwargs)
+        exhausted = object()
+
+        # Each batch fetch blocks on the driver, so pull rows off the loop
+        while True:
+            row = await self._run(next, rows, exhausted)
+
+            if row is exhausted:
+                break
+
+            yield row
+
+    def __getattr__(self, name):
+        attribute = getattr(self._query, name)
+
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        if name.startswith("stream_"):
+            return functools.partial(self._stream, attribute)
+
+        return functools.partial(self._run, attribute)
+
+
+class AsyncAppliances(_AsyncQuery):
+    query_class = Appliances
+
+
+class AsyncQueryCustomerAppliances(_AsyncQuery):
+    query_class = QueryCustomerAppliances
+
+
+class AsyncQueryCustomers(_AsyncQuery):
+    query_class = QueryCustomers
+
+
+class AsyncQueryEngineers(_AsyncQuery):
+    query_class = QueryEngineers
+
+
+class AsyncQueryServiceGuides(_AsyncQuery):
+    query_class = QueryServiceGuides
+
+
+async def gather_queries(*coroutines, return_exceptions=False):
+    return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+
+
+def run_queries(*coroutines, return_exceptions=False):
+    return asyncio.run(
+        gather_queries(*coroutines, return_exceptions=return_exceptions)
+    )
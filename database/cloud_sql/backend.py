@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import time
+import atexit
+import calendar
+import datetime
+import threading
+import contextlib
+import sqlalchemy
+import streamlit as st
+
+from google.cloud.sql.connector import Connector
+from google.oauth2.service_account import Credentials
+
+from database.cloud_sql.instrumentation import (
+    InstrumentedQueuePool,
+    instrument_engine,
+    query_metrics,
+)
+
+
+SUPPORTED_BACKENDS = ("cloud_sql", "sqlite")
+
+DATABASE_BACKEND = os.environ.get("LOGIQ_DATABASE_BACKEND", "cloud_sql")
+SQLITE_DATABASE_PATH = os.environ.get(
+    "LOGIQ_SQLITE_DATABASE_PATH", "database/persistent/logiq_local.db"
+)
+
+# MySQL only syntax used by the Query*, Model* and Migrate* statements,
+# rewritten to the SQLite equivalent before execution
+SQLITE_REWRITES = [
+    (re.compile(r"\bAUTO_INCREMENT\b"), "AUTOINCREMENT"),
+    (re.compile(r"\s+ON UPDATE CURRENT_TIMESTAMP\b"), ""),
+    (re.compile(r"\bINSERT IGNORE INTO\b"), "INSERT OR IGNORE INTO"),
+    (re.compile(r"\s+FOR UPDATE\b"), ""),
+    (re.compile(r"\bON DUPLICATE KEY UPDATE\b"), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)"), r"excluded.\1"),
+    (re.compile(r"^\s*EXPLAIN\b(?!\s+QUERY PLAN)"), "EXPLAIN QUERY PLAN"),
+    (
+        re.compile(r"\bDATE_ADD\(([^,]+), INTERVAL (\w+) MONTH\)"),
+        r"DATE_ADD_MONTHS(\1, \2)",
+    ),
+]
+
+CLOUD_SQL_INSTANCE = "logiq-project:us-central1:logiq-mysql-db"
+CLOUD_SQL_CREDENTIALS_FILE = "config/cloud_sql_editor_service_account_key.json"
+
+_sqlite_engines = {}
+_sqlite_engines_lock = threading.Lock()
+
+# One connector (and its background refresh thread) and one pooled engine are
+# shared by every Query*, Model* and Migrate* instance in the process
+_cloud_sql_connector = None
+_cloud_sql_password = None
+_cloud_sql_engine = None
+_cloud_sql_lock = threading.Lock()
+
+
+def set_database_backend(backend, sqlite_database_path=None):
+    global DATABASE_BACKEND, SQLITE_DATABASE_PATH
+
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported database backend: {backend}")
+
+    DATABASE_BACKEND = backend
+
+    if sqlite_database_path:
+        SQLITE_DATABASE_PATH = sqlite_database_path
+
+
+def use_cloud_sql():
+    return DATABASE_BACKEND == "cloud_sql"
+
+
+def _json_contains(target, candidate):
+    if target is None or candidate is None:
+        return None
+
+    target = json.loads(target)
+    candidate = json.loads(candidate)
+
+    if isinstance(target, list):
+        if isinstance(candidate, list):
+            return int(all(value in target for value in candidate))
+
+        return int(candidate in target)
+
+    return int(target == candidate)
+
+
+def _date_add_months(value, months):
+    if value is None or months is None:
+        return None
+
+    value = datetime.date.fromisoformat(str(value)[:10])
+    month_index = value.month - 1 + int(months)
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+
+    # MySQL clamps to the last day of a shorter month, SQLite's date() rolls over
+    day = min(value.day, calendar.monthrange(year, month)[1])
+
+    return datetime.date(year, month, day).isoformat()
+
+
+def _json_quote(value):
+    if value is None:
+        return None
+
+    return json.dumps(str(value))
+
+
+def _rewrite_for_sqlite(conn, cursor, statement, parameters, context, executemany):
+    for pattern, replacement in SQLITE_REWRITES:
+        statement = pattern.sub(replacement, statement)
+
+    return statement, parameters
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function(
+        "JSON_CONTAINS", 2, _json_contains, deterministic=True
+    )
+    dbapi_connection.create_function(
+        "JSON_QUOTE", 1, _json_quote, deterministic=True)
+    dbapi_connection.create_function(
+        "DATE_ADD_MONTHS", 2, _date_add_months, deterministic=True
+    )
+
+
+def _get_sqlite_engine(database_path):
+    engine = _sqlite_engines.get(database_path)
+
+    if engine is None:
+        with _sqlite_engines_lock:
+            engine = _sqlite_engines.get(database_path)
+
+            if engine is None:
+                engine = sqlalchemy.create_engine(
+                    f"sqlite:///{database_path}",
+                    connect_args={"check_same_thread": False},
+                    poolclass=InstrumentedQueuePool,
+                )
+
+                sqlalchemy.event.listen(
+                    engine, "connect", _register_sqlite_functions)
+                sqlalchemy.event.listen(
+                    engine, "before_cursor_execute", _rewrite_for_sqlite, retval=True
+                )
+
+                _sqlite_engines[database_path] = instrument_engine(engine)
+
+    return engine
+
+
+def get_cloud_sql_connector():
+    global _cloud_sql_connector, _cloud_sql_password
+
+    if _cloud_sql_connector is None:
+        with _cloud_sql_lock:
+            if _cloud_sql_connector is None:
+                start = time.perf_counter()
+
+                credentials = Credentials.from_service_account_file(
+                    CLOUD_SQL_CREDENTIALS_FILE
+                )
+
+                _cloud_sql_password = st.secrets["CLOUD_SQL_PASSWORD"]
+                _cloud_sql_connector = Connector(credentials=credentials)
+
+                query_metrics.record_connector_startup(
+                    time.perf_counter() - start)
+
+    return _cloud_sql_connector
+
+
+def get_cloud_sql_connection():
+    connector = get_cloud_sql_connector()
+
+    conn = connector.connect(
+        CLOUD_SQL_INSTANCE,
+        "pymysql",
+        user="root",
+        password=_cloud_sql_password,
+        db="logiq_db",
+    )
+    return conn
+
+
+def close_cloud_sql_connector():
+    global _cloud_sql_connector, _cloud_sql_engine
+
+    with _cloud_sql_lock:
+        if _cloud_sql_engine is not None:
+            _cloud_sql_engine.dispose()
+            _cloud_sql_engine = None
+
+        if _cloud_sql_connector is not None:
+            _cloud_sql_connector.close()
+            _cloud_sql_connector = None
+
+
+atexit.register(close_cloud_sql_connector)
+
+
+def get_engine():
+    global _cloud_sql_engine
+
+    if not use_cloud_sql():
+        return _get_sqlite_engine(SQLITE_DATABASE_PATH)
+
+    if _cloud_sql_engine is None:
+        with _cloud_sql_lock:
+            if _cloud_sql_engine is None:
+                _cloud_sql_engine = instrument_engine(
+                    sqlalchemy.create_engine(
+                        "mysql+pymysql://",
+                        creator=get_cloud_sql_connection,
+                        poolclass=InstrumentedQueuePool,
+                        pool_pre_ping=True,
+                        pool_recycle=1800,
+                    )
+                )
+
+    return _cloud_sql_engine
+
+
+@contextlib.contextmanager
+def connect(db_conn=None):
+    # Reuse the caller's connection, e.g. one held open by a UnitOfWork
+    if db_conn is not None:
+        yield db_conn
+        return
+
+    with get_engine().connect() as db_conn:
+        yield db_conn
+
+
+if __name__ == "__main__":
+    from database.cloud_sql import backend
+    from database.cloud_sql.models import (
+        ModelAppliances,
+        ModelCustomerAppliances,
+        ModelCustomers,
+        ModelEngineers,
+        ModelServiceGuides,
+    )
+    from database.cloud_sql.schema_migrations import SchemaMigrations
+
+    # Run as a script this module is __main__, configure the imported copy
+    backend.set_database_backend("sqlite")
+
+    for model in (
+        ModelAppliances,
+        ModelCustomerAppliances,
+        ModelCustomers,
+        ModelEngineers,
+        ModelServiceGuides,
+    ):
+        model().create_table()
+
+    applied_versions = SchemaMigrations().apply_pending_migrations()
+
+    print("Created local database:", backend.SQLITE_DATABASE_PATH)
+    print("Applied migrations:", applied_versions or "none pending")
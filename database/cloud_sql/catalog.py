@@ -0,0 +1,327 @@
+import sys
+import time
+import bisect
+import datetime
+import threading
+
+from database.cloud_sql.queries import Appliances
+
+
+class ApplianceCatalog:
+    CATALOG_COLUMNS = [
+        "model_number",
+        "appliance_name",
+        "brand",
+        "category",
+        "sub_category",
+        "appliance_image_url",
+        "warranty_period",
+        "launch_date",
+        "energy_rating",
+        "availability_status",
+    ]
+
+    FEATURED_COLUMNS = ["category", "model_number",
+                        "brand", "appliance_image_url"]
+
+    # Writes from other processes only reach this copy once it expires
+    INDEX_TTL_SECONDS = 300
+
+    _index = None
+    _index_expires_on = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_featured_rank(appliance):
+        launch_date = appliance["launch_date"]
+
+        if isinstance(launch_date, str):
+            launch_date = datetime.date.fromisoformat(launch_date[:10])
+
+        # Ascending order of the rank is best energy rating, then newest launch
+        return (
+            -(appliance["energy_rating"] or 0),
+            -launch_date.toordinal() if launch_date else 0,
+            appliance["model_number"],
+        )
+
+    @classmethod
+    def _add_to_index(cls, index, appliance):
+        category = appliance["category"]
+        sub_category = appliance["sub_category"]
+        brand = appliance["brand"]
+        model_number = appliance["model_number"]
+
+        model_numbers = (
+            index["categories"]
+            .setdefault(category, {})
+            .setdefault(sub_category, {})
+            .setdefault(brand, [])
+        )
+
+        if model_number not in model_numbers:
+            model_numbers.append(model_number)
+
+        model_numbers = (
+            index["sub_categories"].setdefault(
+                sub_category, {}).setdefault(brand, [])
+        )
+
+        if model_number not in model_numbers:
+            model_numbers.append(model_number)
+
+        index["sub_category_to_category"].setdefault(sub_category, category)
+        index["models"][(brand, sub_category, model_number)] = appliance
+        index["model_keys"][model_number] = (brand, sub_category, model_number)
+
+        if appliance["availability_status"] == "available":
+            bisect.insort(
+                index["featured"].setdefault(category, []),
+                (cls._get_featured_rank(appliance),
+                 (brand, sub_category, model_number)),
+            )
+
+    @classmethod
+    def _remove_from_index(cls, index, appliance):
+        category = appliance["category"]
+        sub_category = appliance["sub_category"]
+        brand = appliance["brand"]
+        model_number = appliance["model_number"]
+        model_key = (brand, sub_category, model_number)
+
+        for brands, parent, parent_key in (
+            (index["categories"][category][sub_category],
+             index["categories"][category], sub_category),
+            (index["sub_categories"][sub_category],
+             index["sub_categories"], sub_category),
+        ):
+            brands[brand].remove(model_number)
+
+            if not brands[brand]:
+                del brands[brand]
+
+            if not brands:
+                del parent[parent_key]
+
+        if not index["categories"][category]:
+            del index["categories"][category]
+
+        if sub_category not in index["sub_categories"]:
+            index["sub_category_to_category"].pop(sub_category, None)
+
+        del index["models"][model_key]
+        del index["model_keys"][model_number]
+
+        featured = index["featured"].get(category, [])
+        position = bisect.bisect_left(
+            featured, (cls._get_featured_rank(appliance), model_key)
+        )
+
+        if position < len(featured) and featured[position][1] == model_key:
+            del featured[position]
+
+            if not featured:
+                del index["featured"][category]
+
+    @staticmethod
+    def _copy_index(index):
+        # Readers iterate the index without the lock, writers change a copy
+        # and swap it in. Appliance dicts are replaced, never mutated.
+        return {
+            "categories": {
+                category: {
+                    sub_category: {
+                        brand: list(model_numbers)
+                        for brand, model_numbers in brands.items()
+                    }
+                    for sub_category, brands in sub_categories.items()
+                }
+                for category, sub_categories in index["categories"].items()
+            },
+            "sub_categories": {
+                sub_category: {
+                    brand: list(model_numbers)
+                    for brand, model_numbers in brands.items()
+                }
+                for sub_category, brands in index["sub_categories"].items()
+            },
+            "sub_category_to_category": dict(index["sub_category_to_category"]),
+            "models": dict(index["models"]),
+            "model_keys": dict(index["model_keys"]),
+            "featured": {
+                category: list(appliances)
+                for category, appliances in index["featured"].items()
+            },
+        }
+
+    def _load_index(self):
+        query_appliances = Appliances()
+        appliances = query_appliances.fetch_all_appliances(self.CATALOG_COLUMNS)
+
+        index = {
+            "categories": {},
+            "sub_categories": {},
+            "sub_category_to_category": {},
+            "models": {},
+            "model_keys": {},
+            "featured": {},
+        }
+
+        for row in appliances:
+            appliance = {
+                column: sys.intern(value) if isinstance(value, str) else value
+                for column, value in zip(self.CATALOG_COLUMNS, row)
+            }
+
+            self._add_to_index(index, appliance)
+
+        return index
+
+    def _get_index(self):
+        index = ApplianceCatalog._index
+
+        if index is None or ApplianceCatalog._index_expires_on <= time.monotonic():
+            with ApplianceCatalog._lock:
+                if (
+                    ApplianceCatalog._index is None
+                    or ApplianceCatalog._index_expires_on <= time.monotonic()
+                ):
+                    ApplianceCatalog._index = self._load_index()
+                    ApplianceCatalog._index_expires_on = (
+                        time.monotonic() + self.INDEX_TTL_SECONDS
+                    )
+
+                index = ApplianceCatalog._index
+
+        return index
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._index = None
+
+    @classmethod
+    def upsert_appliance(cls, appliance):
+        with cls._lock:
+            if cls._index is None:
+                return
+
+            appliance = {
+                column: sys.intern(value) if isinstance(value, str) else value
+                for column, value in appliance.items()
+                if column in cls.CATALOG_COLUMNS
+            }
+
+            index = cls._copy_index(cls._index)
+            model_key = index["model_keys"].get(appliance["model_number"])
+
+            if model_key is not None:
+                existing_appliance = index["models"][model_key]
+                cls._remove_from_index(index, existing_appliance)
+
+                appliance = {**existing_appliance, **appliance}
+
+            # Rows missing catalog columns cannot be indexed, reload lazily
+            if any(column not in appliance for column in cls.CATALOG_COLUMNS):
+                cls._index = None
+                return
+
+            cls._add_to_index(index, appliance)
+            cls._index = index
+
+    @classmethod
+    def remove_appliance(cls, model_number):
+        with cls._lock:
+            if cls._index is None:
+                return
+
+            model_key = cls._index["model_keys"].get(model_number)
+
+            if model_key is not None:
+                index = cls._copy_index(cls._index)
+                cls._remove_from_index(index, index["models"][model_key])
+                cls._index = index
+
+    def fetch_distinct_appliance_data(self):
+        return {
+            sub_category: {
+                brand: list(model_numbers) for brand, model_numbers in brands.items()
+            }
+            for sub_category, brands in self._get_index()["sub_categories"].items()
+        }
+
+    def fetch_distinct_appliance_data_with_category(self):
+        return {
+            category: {
+                sub_category: {
+                    brand: list(model_numbers)
+                    for brand, model_numbers in brands.items()
+                }
+                for sub_category, brands in sub_categories.items()
+            }
+            for category, sub_categories in self._get_index()["categories"].items()
+        }
+
+    def fetch_distinct_appliance_categories(self):
+        return list(self._get_index()["categories"].keys())
+
+    def fetch_distinct_appliance_sub_categories_by_category(
+            self, category=None):
+        if category:
+            return list(self._get_index()["categories"].get(category, {}).keys())
+
+        return list(self._get_index()["sub_categories"].keys())
+
+    def fetch_category_by_sub_caegory(self, sub_category):
+        return str(self._get_index()["sub_category_to_category"][sub_category])
+
+    def fetch_distinct_appliance_brands_by_sub_category(self, sub_category):
+        return list(self._get_index()["sub_categories"].get(
+            sub_category, {}).keys())
+
+    def fetch_distinct_model_numbers_by_brand_and_sub_category(
+        self, brand, sub_category
+    ):
+        return list(
+            self._get_index()["sub_categories"].get(
+                sub_category, {}).get(brand, [])
+        )
+
+    def fetch_warranty_period_and_appliance_image_url_by_brand_sub_category_and_model_number(
+        self, brand, sub_category, model_number
+    ):
+        appliance = self._get_index()["models"][(
+            brand, sub_category, model_number)]
+
+        return int(appliance["warranty_period"]), appliance["appliance_image_url"]
+
+    def fetch_best_appliances_by_energy_rating(self, count, category=None):
+        index = self._get_index()
+        featured = index["featured"]
+
+        if category:
+            ranked_appliances = featured.get(category, [])[:count]
+
+        else:
+            ranked_appliances = []
+            depth = 0
+
+            # Spread picks across categories, each category's best goes first
+            while len(ranked_appliances) < count:
+                tier = sorted(
+                    appliances[depth]
+                    for appliances in featured.values()
+                    if len(appliances) > depth
+                )
+
+                if not tier:
+                    break
+
+                ranked_appliances.extend(tier[: count - len(ranked_appliances)])
+                depth += 1
+
+        return [
+            tuple(index["models"][model_key][column]
+                  for column in self.FEATURED_COLUMNS)
+            for _, model_key in ranked_appliances
+        ]
@@ -0,0 +1,97 @@
+import contextlib
+import sqlalchemy
+
+
+ENGINEER_DISTRICT_STATS_COLUMNS = (
+    "engineer_count",
+    "available_count",
+    "rating_sum",
+    "active_tickets_total",
+    "reward_points_total",
+)
+
+# Shared by the schema migration backfill and rebuild_engineer_district_stats
+ENGINEER_DISTRICT_STATS_BACKFILL = """
+    INSERT INTO engineer_district_stats (district, engineer_count, available_count, rating_sum, active_tickets_total, reward_points_total)
+    SELECT district, COUNT(*), SUM(CASE WHEN availability THEN 1 ELSE 0 END), SUM(rating), SUM(active_tickets), SUM(reward_points)
+    FROM engineers
+    GROUP BY district
+    """
+
+
+def _apply_engineer_district_stats_delta(db_conn, where_clause, parameters, sign):
+    # Locking read, a concurrent write to the same engineers waits for this
+    # transaction so the subtracted row is the one that gets updated
+    query = sqlalchemy.text(
+        f"""
+        SELECT district, COUNT(*), SUM(CASE WHEN availability THEN 1 ELSE 0 END), SUM(rating), SUM(active_tickets), SUM(reward_points)
+        FROM engineers
+        WHERE {where_clause}
+        GROUP BY district
+        FOR UPDATE
+        """
+    ).bindparams(
+        *[
+            sqlalchemy.bindparam(name, expanding=True)
+            for name, value in parameters.items()
+            if isinstance(value, (list, tuple))
+        ]
+    )
+
+    district_totals = db_conn.execute(query, parameters=parameters).fetchall()
+
+    if not district_totals:
+        return
+
+    db_conn.execute(
+        sqlalchemy.text(
+            f"""
+            INSERT INTO engineer_district_stats (district, {', '.join(ENGINEER_DISTRICT_STATS_COLUMNS)})
+            VALUES (:district, {', '.join(f':{column}' for column in ENGINEER_DISTRICT_STATS_COLUMNS)})
+            ON DUPLICATE KEY UPDATE {', '.join(f'{column} = {column} + VALUES({column})' for column in ENGINEER_DISTRICT_STATS_COLUMNS)}, updated_on = CURRENT_TIMESTAMP
+            """
+        ),
+        parameters=[
+            {
+                "district": district_total[0],
+                **{
+                    column: sign * (value or 0)
+                    for column, value in zip(
+                        ENGINEER_DISTRICT_STATS_COLUMNS, district_total[1:]
+                    )
+                },
+            }
+            for district_total in district_totals
+        ],
+    )
+
+    if sign < 0:
+        db_conn.execute(
+            sqlalchemy.text(
+                """
+                DELETE FROM engineer_district_stats
+                WHERE district IN :districts AND engineer_count <= 0
+                """
+            ).bindparams(sqlalchemy.bindparam("districts", expanding=True)),
+            parameters={
+                "districts": [district_total[0] for district_total in district_totals]
+            },
+        )
+
+
+@contextlib.contextmanager
+def maintain_engineer_district_stats(db_conn, where_clause, parameters):
+    # Take the matching engineers out of their district totals before the
+    # write and add them back after it, all inside the caller's transaction
+    _apply_engineer_district_stats_delta(db_conn, where_clause, parameters, -1)
+
+    yield
+
+    _apply_engineer_district_stats_delta(db_conn, where_clause, parameters, 1)
+
+
+def rebuild_engineer_district_stats(db_conn):
+    db_conn.execute(sqlalchemy.text("DELETE FROM engineer_district_stats"))
+    result = db_conn.execute(sqlalchemy.text(ENGINEER_DISTRICT_STATS_BACKFILL))
+
+    return result.rowcount
@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import sqlalchemy
+
+from collections import deque
+
+
+SLOW_QUERY_SECONDS = float(os.environ.get("LOGIQ_SLOW_QUERY_SECONDS", "0.5"))
+SLOW_QUERY_LOG_SIZE = 100
+MAX_TRACKED_STATEMENTS = 500
+
+logger = logging.getLogger(__name__)
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 6),
+            "max_seconds": round(self.max_seconds, 6),
+            "mean_seconds": round(self.total_seconds / self.count, 6)
+            if self.count
+            else 0.0,
+        }
+
+
+class QueryMetrics:
+    def __init__(self, slow_query_seconds=SLOW_QUERY_SECONDS):
+        self.slow_query_seconds = slow_query_seconds
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._connector_startup = _Timing()
+            self._connect = _Timing()
+            self._pool_checkout = _Timing()
+            self._statement = _Timing()
+            self._statements = {}
+            self._rows_returned = 0
+            self._rows_affected = 0
+            self._errors = 0
+            self._slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+    def record_connector_startup(self, seconds):
+        with self._lock:
+            self._connector_startup.record(seconds)
+
+    def record_connect(self, seconds):
+        with self._lock:
+            self._connect.record(seconds)
+
+    def record_pool_checkout(self, seconds):
+        with self._lock:
+            self._pool_checkout.record(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self._errors += 1
+
+    def record_statement(self, statement, parameters, seconds, row_count, is_select):
+        normalized_statement = _normalize_statement(statement)
+        is_slow_query = seconds >= self.slow_query_seconds
+
+        if is_slow_query:
+            redacted_parameters = _redact_parameters(parameters)
+
+        with self._lock:
+            self._statement.record(seconds)
+
+            statement_timing = self._statements.get(normalized_statement)
+
+            if (
+                statement_timing is None
+                and len(self._statements) < MAX_TRACKED_STATEMENTS
+            ):
+                statement_timing = _Timing()
+                self._statements[normalized_statement] = statement_timing
+
+            if statement_timing is not None:
+                statement_timing.record(seconds)
+
+            # -1 when the row count is not known up front, e.g. SQLite SELECTs
+            # and streamed results, those rows are left out of the totals
+            if row_count >= 0:
+                if is_select:
+                    self._rows_returned += row_count
+                else:
+                    self._rows_affected += row_count
+
+            if is_slow_query:
+                self._slow_queries.append(
+                    {
+                        "statement": normalized_statement,
+                        "parameters": redacted_parameters,
+                        "seconds": round(seconds, 6),
+                        "logged_at": time.time(),
+                    }
+                )
+
+        if is_slow_query:
+            logger.warning(
+                "Slow query (%.3fs): %s %s",
+                seconds,
+                normalized_statement,
+                redacted_parameters,
+            )
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                "connector_startup": self._connector_startup.to_dict(),
+                "connect": self._connect.to_dict(),
+                "pool_checkout": self._pool_checkout.to_dict(),
+                "statement": self._statement.to_dict(),
+                "rows_returned": self._rows_returned,
+                "rows_affected": self._rows_affected,
+                "errors": self._errors,
+                "slow_query_seconds": self.slow_query_seconds,
+                "slow_queries": list(self._slow_queries),
+                "statements": {
+                    statement: timing.to_dict()
+                    for statement, timing in self._statements.items()
+                },
+            }
+
+    def dump_metrics_json(self, file_path):
+        with open(file_path, "w") as metrics_file:
+            json.dump(self.get_metrics(), metrics_file, indent=2)
+
+    def render_prometheus_metrics(self):
+        metrics = self.get_metrics()
+        lines = []
+
+        for name in ("connector_startup", "connect", "pool_checkout", "statement"):
+            timing = metrics[name]
+            metric_name = f"logiq_cloud_sql_{name}_seconds"
+
+            lines.append(f"# TYPE {metric_name} summary")
+            lines.append(f"{metric_name}_count {timing['count']}")
+            lines.append(f"{metric_name}_sum {timing['total_seconds']}")
+            lines.append(f"{metric_name}_max {timing['max_seconds']}")
+
+        for name in ("rows_returned", "rows_affected", "errors"):
+            metric_name = f"logiq_cloud_sql_{name}_total"
+
+            lines.append(f"# TYPE {metric_name} counter")
+            lines.append(f"{metric_name} {metrics[name]}")
+
+        lines.append("# TYPE logiq_cloud_sql_slow_queries gauge")
+        lines.append(
+            f"logiq_cloud_sql_slow_queries {len(metrics['slow_queries'])}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _normalize_statement(statement):
+    return re.sub(r"\s+", " ", statement).strip()[:500]
+
+
+def _redact_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+
+    if isinstance(parameters, (list, tuple)):
+        # executemany passes a list of parameter sets, summarise the first one
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [_redact_parameters(parameters[0]), f"<{len(parameters)} rows>"]
+
+        return [f"<{type(value).__name__}>" for value in parameters]
+
+    return "<redacted>"
+
+
+query_metrics = QueryMetrics()
+
+
+class InstrumentedQueuePool(sqlalchemy.pool.QueuePool):
+    def _create_connection(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._create_connection()
+
+        finally:
+            query_metrics.record_connect(time.perf_counter() - start)
+
+    # Includes the connect time when the pool has to open a new connection
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+
+        finally:
+            query_metrics.record_pool_checkout(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _get_row_count(cursor, context):
+    # Unbuffered cursors only know their row count once fully read, PyMySQL
+    # reports the unsigned -1 sentinel for them until then
+    if context is not None and context.execution_options.get("stream_results"):
+        return -1
+
+    row_count = cursor.rowcount
+
+    if row_count is None or row_count < 0 or row_count >= 2**63 - 1:
+        return -1
+
+    return row_count
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+
+    query_metrics.record_statement(
+        statement,
+        parameters,
+        seconds,
+        _get_row_count(cursor, context),
+        cursor.description is not None,
+    )
+
+
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        query_start = exception_context.connection.info.get("query_start")
+
+        if query_start:
+            query_start.pop()
+
+    query_metrics.record_error()
+
+
+def instrument_engine(engine):
+    sqlalchemy.event.listen(engine, "before_cursor_execute",
+                            _before_cursor_execute)
+    sqlalchemy.event.listen(engine, "after_cursor_execute",
+                            _after_cursor_execute)
+    sqlalchemy.event.listen(engine, "handle_error", _handle_error)
+
+    return engine
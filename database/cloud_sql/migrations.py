@@ -1,34 +1,80 @@
 import sqlalchemy
-import streamlit as st
 
-from google.cloud.sql.connector import Connector
-from google.oauth2.service_account import Credentials
+from database.cloud_sql.backend import get_engine
+from database.cloud_sql.catalog import ApplianceCatalog
+from database.cloud_sql.district_stats import (
+    maintain_engineer_district_stats,
+    rebuild_engineer_district_stats,
+)
+from database.cloud_sql.profile_cache import (
+    customer_profile_cache,
+    engineer_profile_cache,
+)
+from database.cloud_sql.query_cache import query_cache
+from database.cloud_sql.query_registry import QueryRegistry
+from database.cloud_sql.serial_number_filter import SerialNumberFilter
 
 
-class MigrateAppliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+def _build_bulk_update_query(table_name, key_column, rows):
+    update_columns = []
+    parameters = {}
+
+    for idx, row in enumerate(rows):
+        parameters[f"{key_column}_{idx}"] = row[key_column]
+
+        for column, value in row.items():
+            if column == key_column:
+                continue
+
+            if column not in update_columns:
+                update_columns.append(column)
+
+            parameters[f"{column}_{idx}"] = value
+
+    # Column names are interpolated into the statement, only known ones pass
+    QueryRegistry.validate_columns(table_name, [key_column] + update_columns)
+
+    set_clauses = []
+
+    for column in update_columns:
+        when_clauses = " ".join(
+            f"WHEN :{key_column}_{idx} THEN :{column}_{idx}"
+            for idx, row in enumerate(rows)
+            if column in row
+        )
+        set_clauses.append(
+            f"{column} = CASE {key_column} {when_clauses} ELSE {column} END"
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+    query = f"""
+        UPDATE {table_name}
+        SET {', '.join(set_clauses)}
+        WHERE {key_column} IN ({', '.join(f':{key_column}_{idx}' for idx in range(len(rows)))})
+        """
+
+    return sqlalchemy.text(query), parameters
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
+
+def _bulk_update(db_conn, table_name, key_column, rows, batch_size):
+    rows = list(rows)
+    updated_count = 0
+
+    for start in range(0, len(rows), batch_size):
+        query, parameters = _build_bulk_update_query(
+            table_name, key_column, rows[start: start + batch_size]
         )
-        return conn
 
+        result = db_conn.execute(query, parameters=parameters)
+        updated_count += result.rowcount
+
+    return updated_count
+
+
+class MigrateAppliances:
     def update_appliance(self, model_number, **kwargs):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        QueryRegistry.validate_columns("appliances", kwargs)
+
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             update_query = "UPDATE appliances SET "
@@ -47,12 +93,19 @@ class MigrateAppliances:
             db_conn.execute(query, parameters=update_values)
             db_conn.commit()
 
-    def delete_appliance(self, model_number):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
+        query_cache.invalidate(
+            "appliances", model_number, kwargs.get("model_number", model_number)
         )
 
+        if "model_number" in kwargs:
+            ApplianceCatalog.invalidate()
+        else:
+            ApplianceCatalog.upsert_appliance(
+                {"model_number": model_number, **kwargs})
+
+    def delete_appliance(self, model_number):
+        pool = get_engine()
+
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
                 """
@@ -64,32 +117,16 @@ class MigrateAppliances:
 
             db_conn.commit()
 
+        query_cache.invalidate("appliances", model_number)
+        ApplianceCatalog.remove_appliance(model_number)
 
-class MigrateCustomers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
-
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
-
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
 
+class MigrateCustomers:
     def update_customer(self, username, **kwargs):
         try:
-            pool = sqlalchemy.create_engine(
-                "mysql+pymysql://",
-                creator=self._get_connection,
-            )
+            QueryRegistry.validate_columns("customers", kwargs)
+
+            pool = get_engine()
 
             with pool.connect() as db_conn:
                 update_query = "UPDATE customers SET "
@@ -108,16 +145,35 @@ class MigrateCustomers:
                 db_conn.execute(query, parameters=update_values)
                 db_conn.commit()
 
+                query_cache.invalidate("customers", username)
+                customer_profile_cache.invalidate(username)
                 return True
 
         except Exception as error:
             return False
 
+    def bulk_update(self, rows, batch_size=500):
+        try:
+            pool = get_engine()
+
+            rows = list(rows)
+
+            with pool.begin() as db_conn:
+                updated_count = _bulk_update(
+                    db_conn, "customers", "username", rows, batch_size
+                )
+
+            usernames = [row["username"] for row in rows]
+
+            query_cache.invalidate("customers", *usernames)
+            customer_profile_cache.invalidate(*usernames)
+            return updated_count
+
+        except Exception as error:
+            return False
+
     def delete_customer(self, username):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -131,32 +187,18 @@ class MigrateCustomers:
 
             db_conn.commit()
 
+        query_cache.invalidate("customers", username)
+        customer_profile_cache.invalidate(username)
 
-class MigrateEngineers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
-
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
-
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
 
+class MigrateEngineers:
     def update_engineer(self, engineer_id, **kwargs):
         try:
-            pool = sqlalchemy.create_engine(
-                "mysql+pymysql://",
-                creator=self._get_connection,
-            )
+            # Column names are interpolated into the statement. engineer_id is
+            # taken by the signature, so the key can never be part of the SET
+            QueryRegistry.validate_columns("engineers", kwargs)
+
+            pool = get_engine()
 
             with pool.connect() as db_conn:
                 update_query = "UPDATE engineers SET "
@@ -172,20 +214,48 @@ class MigrateEngineers:
                 update_values["engineer_id"] = engineer_id
 
                 query = sqlalchemy.text(update_query)
-                db_conn.execute(query, parameters=update_values)
+
+                with maintain_engineer_district_stats(
+                    db_conn, "engineer_id = :engineer_id", {"engineer_id": engineer_id}
+                ):
+                    db_conn.execute(query, parameters=update_values)
+
                 db_conn.commit()
 
+                query_cache.invalidate("engineers", engineer_id)
+                engineer_profile_cache.invalidate(engineer_id)
                 return True
 
         except Exception as error:
             return False
 
+    def bulk_update(self, rows, batch_size=500):
+        try:
+            pool = get_engine()
+
+            rows = list(rows)
+            engineer_ids = [row["engineer_id"] for row in rows]
+
+            with pool.begin() as db_conn:
+                with maintain_engineer_district_stats(
+                    db_conn,
+                    "engineer_id IN :engineer_ids",
+                    {"engineer_ids": engineer_ids},
+                ):
+                    updated_count = _bulk_update(
+                        db_conn, "engineers", "engineer_id", rows, batch_size
+                    )
+
+            query_cache.invalidate("engineers", *engineer_ids)
+            engineer_profile_cache.invalidate(*engineer_ids)
+            return updated_count
+
+        except Exception as error:
+            return False
+
     def toggle_engineer_availability(self, engineer_id):
         try:
-            pool = sqlalchemy.create_engine(
-                "mysql+pymysql://",
-                creator=self._get_connection,
-            )
+            pool = get_engine()
 
             with pool.connect() as db_conn:
                 update_query = """
@@ -196,19 +266,90 @@ class MigrateEngineers:
                 update_values = {"engineer_id": engineer_id}
                 query = sqlalchemy.text(update_query)
 
-                db_conn.execute(query, parameters=update_values)
+                with maintain_engineer_district_stats(
+                    db_conn, "engineer_id = :engineer_id", update_values
+                ):
+                    db_conn.execute(query, parameters=update_values)
+
                 db_conn.commit()
 
+                query_cache.invalidate("engineers", engineer_id)
+                engineer_profile_cache.invalidate(engineer_id)
                 return True
 
         except Exception as error:
             return False
 
+    def set_availability_by_district(self, district, availability):
+        try:
+            pool = get_engine()
+
+            with pool.begin() as db_conn:
+                query = sqlalchemy.text(
+                    """
+                    UPDATE engineers
+                    SET availability = :availability
+                    WHERE district = :district
+                    """
+                )
+
+                with maintain_engineer_district_stats(
+                    db_conn, "district = :district", {"district": district}
+                ):
+                    result = db_conn.execute(
+                        query,
+                        parameters={"availability": availability,
+                                    "district": district},
+                    )
+
+            # District members are not indexed in the caches, drop every entry
+            query_cache.invalidate("engineers")
+            engineer_profile_cache.clear()
+            return result.rowcount
+
+        except Exception as error:
+            return False
+
+    def set_availability_for_engineers(self, engineer_ids, availability):
+        engineer_ids = list(engineer_ids)
+
+        if not engineer_ids:
+            return 0
+
+        try:
+            pool = get_engine()
+
+            with pool.begin() as db_conn:
+                query = sqlalchemy.text(
+                    """
+                    UPDATE engineers
+                    SET availability = :availability
+                    WHERE engineer_id IN :engineer_ids
+                    """
+                ).bindparams(sqlalchemy.bindparam("engineer_ids", expanding=True))
+
+                with maintain_engineer_district_stats(
+                    db_conn,
+                    "engineer_id IN :engineer_ids",
+                    {"engineer_ids": engineer_ids},
+                ):
+                    result = db_conn.execute(
+                        query,
+                        parameters={
+                            "availability": availability,
+                            "engineer_ids": engineer_ids,
+                        },
+                    )
+
+            query_cache.invalidate("engineers", *engineer_ids)
+            engineer_profile_cache.invalidate(*engineer_ids)
+            return result.rowcount
+
+        except Exception as error:
+            return False
+
     def delete_engineer(self, engineer_id):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -218,34 +359,30 @@ class MigrateEngineers:
                 """
             )
 
-            db_conn.execute(query, parameters={"engineer_id": engineer_id})
+            with maintain_engineer_district_stats(
+                db_conn, "engineer_id = :engineer_id", {"engineer_id": engineer_id}
+            ):
+                db_conn.execute(query, parameters={"engineer_id": engineer_id})
+
             db_conn.commit()
 
+        query_cache.invalidate("engineers", engineer_id)
+        engineer_profile_cache.invalidate(engineer_id)
 
-class MigrateServiceGuides:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
+    def rebuild_district_stats(self):
+        pool = get_engine()
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+        # Recomputes every district from scratch, for writes made outside
+        # MigrateEngineers and ModelEngineers
+        with pool.begin() as db_conn:
+            return rebuild_engineer_district_stats(db_conn)
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
-    
+
+class MigrateServiceGuides:
     def update_service_guide(self, guide_id, **kwargs):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        QueryRegistry.validate_columns("service_guides", kwargs)
+
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             update_query = "UPDATE service_guides SET "
@@ -264,11 +401,11 @@ class MigrateServiceGuides:
             db_conn.execute(query, parameters=update_values)
             db_conn.commit()
 
+        # Cached guides are keyed by model number, not guide id
+        query_cache.invalidate("service_guides")
+
     def delete_service_guide(self, guide_id):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -281,32 +418,15 @@ class MigrateServiceGuides:
             db_conn.execute(query, parameters={"guide_id": guide_id})
             db_conn.commit()
 
+        query_cache.invalidate("service_guides")
 
-class MigrateCustomerAppliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
-
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
-    
+class MigrateCustomerAppliances:
     def update_customer_appliance_by_serial_number(
             self, serial_number, **kwargs):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        QueryRegistry.validate_columns("customer_appliances", kwargs)
+
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             update_query = "UPDATE customer_appliances SET "
@@ -325,11 +445,14 @@ class MigrateCustomerAppliances:
             db_conn.execute(query, parameters=update_values)
             db_conn.commit()
 
+        # Cached appliance lists are keyed by customer, not serial number
+        query_cache.invalidate("customer_appliances")
+
+        if "serial_number" in kwargs:
+            SerialNumberFilter.add(kwargs["serial_number"])
+
     def delete_customer_appliance(self, serial_number):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -341,3 +464,5 @@ class MigrateCustomerAppliances:
 
             db_conn.execute(query, parameters={"serial_number": serial_number})
             db_conn.commit()
+
+        query_cache.invalidate("customer_appliances")
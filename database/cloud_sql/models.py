@@ -1,36 +1,47 @@
 import json
 import random
+import itertools
 import sqlalchemy
-import streamlit as st
 
-from google.cloud.sql.connector import Connector
-from google.oauth2.service_account import Credentials
+from database.cloud_sql.backend import get_engine
+from database.cloud_sql.catalog import ApplianceCatalog
+from database.cloud_sql.district_stats import maintain_engineer_district_stats
+from database.cloud_sql.query_cache import query_cache
+from database.cloud_sql.query_registry import QueryRegistry, TABLE_COLUMNS
+from database.cloud_sql.serial_number_filter import SerialNumberFilter
 
 
-class ModelCustomerAppliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
+def _batched(rows, batch_size):
+    rows = iter(rows)
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
-    
+        if not batch:
+            return
+
+        yield batch
+
+
+def _build_bulk_insert_query(table_name, columns, on_duplicate="error"):
+    if on_duplicate not in ("error", "ignore", "update"):
+        raise ValueError(f"Unsupported duplicate key handling: {on_duplicate}")
+
+    query = f"""
+        INSERT {"IGNORE " if on_duplicate == "ignore" else ""}INTO {table_name} ({', '.join(columns)})
+        VALUES ({', '.join(f':{column}' for column in columns)})
+        """
+
+    if on_duplicate == "update":
+        query += f"ON DUPLICATE KEY UPDATE {
+            ', '.join(f'{column} = VALUES({column})' for column in columns)}"
+
+    return sqlalchemy.text(query)
+
+
+class ModelAppliances:
     def create_table(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -67,10 +78,7 @@ class ModelCustomerAppliances:
         energy_rating,
         availability_status,
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -104,31 +112,57 @@ class ModelCustomerAppliances:
 
             db_conn.commit()
 
+        query_cache.invalidate("appliances", model_number)
+        ApplianceCatalog.upsert_appliance(
+            {
+                "model_number": model_number,
+                "appliance_name": appliance_name,
+                "brand": brand,
+                "category": category,
+                "sub_category": sub_category,
+                "appliance_image_url": appliance_image_url,
+                "warranty_period": warranty_period,
+                "launch_date": launch_date,
+                "energy_rating": energy_rating,
+                "availability_status": availability_status,
+            }
+        )
 
-class ModelCustomerAppliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+    def add_appliances(self, appliances, batch_size=1000, on_duplicate="ignore"):
+        query = _build_bulk_insert_query(
+            "appliances",
+            [
+                "model_number",
+                "appliance_name",
+                "brand",
+                "category",
+                "sub_category",
+                "appliance_image_url",
+                "warranty_period",
+                "launch_date",
+                "energy_rating",
+                "availability_status",
+            ],
+            on_duplicate,
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+        pool = get_engine()
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
+        inserted_count = 0
 
+        with pool.begin() as db_conn:
+            for batch in _batched(appliances, batch_size):
+                result = db_conn.execute(query, parameters=batch)
+                inserted_count += result.rowcount
+
+        query_cache.invalidate("appliances")
+        ApplianceCatalog.invalidate()
+        return inserted_count
+
+
+class ModelCustomerAppliances:
     def create_table(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -149,8 +183,8 @@ class ModelCustomerAppliances:
                     installation_date DATE NOT NULL,
                     created_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    status VARCHAR(255) CHECK(status IN ('active', 'inactive')) NOT NULL DEFAULT 'active'
-                    appliance_image_url VARCHAR(255) NOT NULL,
+                    status VARCHAR(255) CHECK(status IN ('active', 'inactive')) NOT NULL DEFAULT 'active',
+                    appliance_image_url VARCHAR(255) NOT NULL
                 );
                 """
             )
@@ -172,10 +206,7 @@ class ModelCustomerAppliances:
         installation_date,
         appliance_image_url,
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         try:
             with pool.connect() as db_conn:
@@ -206,36 +237,120 @@ class ModelCustomerAppliances:
                 )
 
                 db_conn.commit()
-                return True
+
+            query_cache.invalidate("customer_appliances", customer_id)
+            SerialNumberFilter.add(serial_number)
+            return True
 
         except Exception as error:
             return False
 
+    def register_customer_appliance(
+        self,
+        customer_id,
+        sub_category,
+        brand,
+        model_number,
+        serial_number,
+        purchase_date,
+        purchased_from,
+        seller,
+        installation_date,
+    ):
+        pool = get_engine()
 
-class ModelServiceGuides:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
+        try:
+            with pool.begin() as db_conn:
+                # Category, warranty and image come from the catalog row itself
+                query = sqlalchemy.text(
+                    """
+                    INSERT INTO customer_appliances (customer_id, category, sub_category, brand, model_number, serial_number, purchase_date, warranty_period, warranty_expiration, purchased_from, seller, installation_date, appliance_image_url)
+                    SELECT :customer_id, category, sub_category, brand, model_number, :serial_number, :purchase_date, warranty_period, DATE_ADD(:installation_date, INTERVAL warranty_period MONTH), :purchased_from, :seller, :installation_date, appliance_image_url
+                    FROM appliances
+                    WHERE brand = :brand AND sub_category = :sub_category AND model_number = :model_number
+                    """
+                )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+                result = db_conn.execute(
+                    query,
+                    parameters={
+                        "customer_id": customer_id,
+                        "sub_category": sub_category,
+                        "brand": brand,
+                        "model_number": model_number,
+                        "serial_number": serial_number,
+                        "purchase_date": purchase_date,
+                        "purchased_from": purchased_from,
+                        "seller": seller,
+                        "installation_date": installation_date,
+                    },
+                )
+
+                if result.rowcount != 1:
+                    return False
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
+                query = QueryRegistry.get_select_statement(
+                    "customer_appliances", where_columns=["customer_appliance_id"]
+                )
+
+                created_row = db_conn.execute(
+                    query, parameters={"customer_appliance_id": result.lastrowid}
+                ).fetchone()
+
+            query_cache.invalidate("customer_appliances", customer_id)
+            SerialNumberFilter.add(serial_number)
+            return dict(zip(TABLE_COLUMNS["customer_appliances"], created_row))
+
+        except Exception as error:
+            return False
+
+    def add_customer_appliances(
+        self, customer_appliances, batch_size=500, on_duplicate="ignore"
+    ):
+        query = _build_bulk_insert_query(
+            "customer_appliances",
+            [
+                "customer_id",
+                "category",
+                "sub_category",
+                "brand",
+                "model_number",
+                "serial_number",
+                "purchase_date",
+                "warranty_period",
+                "warranty_expiration",
+                "purchased_from",
+                "seller",
+                "installation_date",
+                "appliance_image_url",
+            ],
+            on_duplicate,
         )
-        return conn
 
+        pool = get_engine()
+
+        customer_ids = set()
+        inserted_count = 0
+
+        with pool.begin() as db_conn:
+            for batch in _batched(customer_appliances, batch_size):
+                result = db_conn.execute(query, parameters=batch)
+                inserted_count += result.rowcount
+
+                customer_ids.update(
+                    customer_appliance["customer_id"] for customer_appliance in batch
+                )
+
+        query_cache.invalidate("customer_appliances", *customer_ids)
+
+        # Bulk loads can be large, rebuild the filter on the next check instead
+        SerialNumberFilter.invalidate()
+        return inserted_count
+
+
+class ModelServiceGuides:
     def create_table(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -254,10 +369,7 @@ class ModelServiceGuides:
             db_conn.execute(query)
 
     def add_service_guide(self, model_number, guide_name, guide_file_url):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -278,12 +390,11 @@ class ModelServiceGuides:
 
             db_conn.commit()
 
+        query_cache.invalidate("service_guides", model_number)
+
     def add_service_guide_by_category(
             self, sub_category, guide_file_url):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -298,53 +409,54 @@ class ModelServiceGuides:
                 query, parameters={"sub_category": sub_category}
             ).fetchall()
 
-            for model_number in model_numbers:
-                model_number = model_number[0]
-                guide_name = f"Service Guide for {model_number}"
-
-                query = sqlalchemy.text(
-                    """
-                    INSERT INTO service_guides (model_number, guide_name, guide_file_url)
-                    VALUES (:model_number, :guide_name, :guide_file_url)
-                    """
+            if model_numbers:
+                query = _build_bulk_insert_query(
+                    "service_guides",
+                    ["model_number", "guide_name", "guide_file_url"],
                 )
 
                 db_conn.execute(
                     query,
-                    parameters={
-                        "model_number": model_number,
-                        "guide_name": guide_name,
-                        "guide_file_url": guide_file_url,
-                    },
+                    parameters=[
+                        {
+                            "model_number": model_number[0],
+                            "guide_name": f"Service Guide for {model_number[0]}",
+                            "guide_file_url": guide_file_url,
+                        }
+                        for model_number in model_numbers
+                    ],
                 )
 
             db_conn.commit()
 
+        query_cache.invalidate(
+            "service_guides", *[model_number[0] for model_number in model_numbers]
+        )
 
-class ModelCustomers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+    def add_service_guides(
+            self, service_guides, batch_size=1000, on_duplicate="ignore"):
+        query = _build_bulk_insert_query(
+            "service_guides",
+            ["model_number", "guide_name", "guide_file_url"],
+            on_duplicate,
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+        pool = get_engine()
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
+        inserted_count = 0
 
+        with pool.begin() as db_conn:
+            for batch in _batched(service_guides, batch_size):
+                result = db_conn.execute(query, parameters=batch)
+                inserted_count += result.rowcount
+
+        query_cache.invalidate("service_guides")
+        return inserted_count
+
+
+class ModelCustomers:
     def create_table(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -387,10 +499,7 @@ class ModelCustomers:
         country,
         zip_code,
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -422,31 +531,25 @@ class ModelCustomers:
 
             db_conn.commit()
 
+        query_cache.invalidate("customers", username)
 
-class ModelEngineers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+class ModelEngineers:
+    MAX_ENGINEER_ID_ATTEMPTS = 10
+
+    def _generate_engineer_id(self, first_name, last_name):
+        return f"ENGR{
+            random.randint(
+                1, 9)}{
+            first_name[0].upper()}{
+            random.randint(
+                1, 9)}{
+            last_name[0].upper()}{
+            random.randint(
+                100, 999)}"
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
-    
     def create_table(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -497,21 +600,10 @@ class ModelEngineers:
         profile_picture,
         language_proficiency,
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
-            engineer_id = f"ENGR{
-                random.randint(
-                    1, 9)}{
-                first_name[0].upper()}{
-                random.randint(
-                    1, 9)}{
-                        last_name[0].upper()}{
-                            random.randint(
-                                100, 999)}"
+            engineer_id = self._generate_engineer_id(first_name, last_name)
 
             query = sqlalchemy.text(
                 """
@@ -520,28 +612,191 @@ class ModelEngineers:
                 """
             )
 
-            db_conn.execute(
-                query,
-                parameters={
-                    "engineer_id": engineer_id,
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "email": email,
-                    "phone_number": phone_number,
-                    "availability": availability,
-                    "street": street,
-                    "city": city,
-                    "district": district,
-                    "state": state,
-                    "country": country,
-                    "zip_code": zip_code,
-                    "specializations": json.dumps(specializations),
-                    "skills": json.dumps(skills),
-                    "training_id": training_id,
-                    "profile_picture": profile_picture,
-                    "language_proficiency": json.dumps(language_proficiency),
-                },
-            )
+            with maintain_engineer_district_stats(
+                db_conn, "engineer_id = :engineer_id", {"engineer_id": engineer_id}
+            ):
+                db_conn.execute(
+                    query,
+                    parameters={
+                        "engineer_id": engineer_id,
+                        "first_name": first_name,
+                        "last_name": last_name,
+                        "email": email,
+                        "phone_number": phone_number,
+                        "availability": availability,
+                        "street": street,
+                        "city": city,
+                        "district": district,
+                        "state": state,
+                        "country": country,
+                        "zip_code": zip_code,
+                        "specializations": json.dumps(specializations),
+                        "skills": json.dumps(skills),
+                        "training_id": training_id,
+                        "profile_picture": profile_picture,
+                        "language_proficiency": json.dumps(language_proficiency),
+                    },
+                )
 
             db_conn.commit()
-            return engineer_id
+
+        query_cache.invalidate("engineers", engineer_id)
+        return engineer_id
+
+    def _generate_unique_engineer_ids(self, db_conn, engineers, taken_ids):
+        engineer_ids = [None] * len(engineers)
+        pending = list(range(len(engineers)))
+
+        for _ in range(self.MAX_ENGINEER_ID_ATTEMPTS):
+            for idx in pending:
+                engineer_id = self._generate_engineer_id(
+                    engineers[idx]["first_name"], engineers[idx]["last_name"]
+                )
+
+                # Also keeps ids unique within the batch
+                while engineer_id in taken_ids:
+                    engineer_id = self._generate_engineer_id(
+                        engineers[idx]["first_name"], engineers[idx]["last_name"]
+                    )
+
+                engineer_ids[idx] = engineer_id
+                taken_ids.add(engineer_id)
+
+            query = sqlalchemy.text(
+                """
+                SELECT engineer_id
+                FROM engineers
+                WHERE engineer_id IN :engineer_ids
+                """
+            ).bindparams(sqlalchemy.bindparam("engineer_ids", expanding=True))
+
+            existing_ids = {
+                row[0]
+                for row in db_conn.execute(
+                    query,
+                    parameters={
+                        "engineer_ids": [engineer_ids[idx] for idx in pending]
+                    },
+                ).fetchall()
+            }
+
+            pending = [idx for idx in pending if engineer_ids[idx] in existing_ids]
+
+            if not pending:
+                return engineer_ids
+
+        raise ValueError("Could not generate unique engineer ids")
+
+    def add_engineers(self, engineers, batch_size=500, on_duplicate="ignore"):
+        # Keys are generated here, updating on a collision would overwrite a
+        # different engineer's row
+        if on_duplicate == "update":
+            raise ValueError(
+                "Engineer ids are generated, on_duplicate='update' is not supported"
+            )
+
+        query = _build_bulk_insert_query(
+            "engineers",
+            [
+                "engineer_id",
+                "first_name",
+                "last_name",
+                "email",
+                "phone_number",
+                "availability",
+                "street",
+                "city",
+                "district",
+                "state",
+                "country",
+                "zip_code",
+                "specializations",
+                "skills",
+                "training_id",
+                "profile_picture",
+                "language_proficiency",
+            ],
+            on_duplicate,
+        )
+
+        inserted_query = sqlalchemy.text(
+            """
+            SELECT engineer_id, email
+            FROM engineers
+            WHERE engineer_id IN :engineer_ids
+            """
+        ).bindparams(sqlalchemy.bindparam("engineer_ids", expanding=True))
+
+        pool = get_engine()
+
+        engineer_ids = []
+        taken_ids = set()
+        inserted_count = 0
+
+        with pool.begin() as db_conn:
+            for batch in _batched(engineers, batch_size):
+                batch_engineer_ids = self._generate_unique_engineer_ids(
+                    db_conn, batch, taken_ids
+                )
+
+                parameters = [
+                    {
+                        **engineer,
+                        "engineer_id": engineer_id,
+                        "training_id": engineer.get("training_id"),
+                        "profile_picture": engineer.get("profile_picture"),
+                        "specializations": json.dumps(
+                            engineer["specializations"]),
+                        "skills": json.dumps(engineer["skills"]),
+                        "language_proficiency": json.dumps(
+                            engineer["language_proficiency"]
+                        ),
+                    }
+                    for engineer, engineer_id in zip(batch, batch_engineer_ids)
+                ]
+
+                with maintain_engineer_district_stats(
+                    db_conn,
+                    "engineer_id IN :engineer_ids",
+                    {"engineer_ids": batch_engineer_ids},
+                ):
+                    result = db_conn.execute(query, parameters=parameters)
+
+                inserted_count += result.rowcount
+
+                # Ignored rows clashed on email or phone number, only report
+                # the ids that made it into the table
+                inserted_emails = dict(
+                    db_conn.execute(
+                        inserted_query,
+                        parameters={"engineer_ids": batch_engineer_ids},
+                    ).fetchall()
+                )
+
+                engineer_ids.extend(
+                    engineer["engineer_id"]
+                    for engineer in parameters
+                    if inserted_emails.get(engineer["engineer_id"]) == engineer["email"]
+                )
+
+        query_cache.invalidate("engineers", *engineer_ids)
+        return engineer_ids, inserted_count
+
+    def save_engineer_coordinates(self, engineer_coordinates):
+        query = _build_bulk_insert_query(
+            "engineer_coordinates",
+            ["engineer_id", "address", "latitude", "longitude"],
+            "update",
+        )
+
+        pool = get_engine()
+
+        try:
+            with pool.begin() as db_conn:
+                for batch in _batched(engineer_coordinates, 500):
+                    db_conn.execute(query, parameters=batch)
+
+            return True
+
+        except Exception as error:
+            return False
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class ProfileCache:
+    def __init__(self, max_size=1024, ttl_seconds=120):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, loader):
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+
+                return entry[1]
+
+            self._misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        # Missing profiles are not cached so new signups are visible at once
+        if value is not None:
+            self.set(key, value, generation)
+
+        return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            # An invalidation while the value was loading may have made it
+            # stale already, drop it rather than serve it until it expires
+            if generation is not None and generation != self._generation:
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+engineer_profile_cache = ProfileCache()
+customer_profile_cache = ProfileCache()
@@ -1,34 +1,84 @@
+import json
 import sqlalchemy
-import streamlit as st
 
-from google.cloud.sql.connector import Connector
-from google.oauth2.service_account import Credentials
+from database.cloud_sql.backend import connect, get_engine
+from database.cloud_sql.profile_cache import (
+    customer_profile_cache,
+    engineer_profile_cache,
+)
+from database.cloud_sql.query_cache import memoize
+from database.cloud_sql.query_registry import QueryRegistry, TABLE_COLUMNS
+from database.cloud_sql.serial_number_filter import SerialNumberFilter
+
+
+# Shared with HOT_QUERIES so the full scan check explains the exact
+# statement. Served by idx_customer_appliances_warranty_expiration, rows come
+# back in expiry order and grouped by customer within each day
+WARRANTY_EXPIRING_QUERY = """
+    SELECT ca.customer_appliance_id, ca.customer_id, ca.category, ca.sub_category, ca.brand, ca.model_number, ca.serial_number, ca.warranty_expiration, c.first_name, c.last_name, c.email, c.phone_number
+    FROM customer_appliances ca
+    JOIN customers c ON c.username = ca.customer_id
+    WHERE ca.warranty_expiration BETWEEN :start_date AND :end_date
+    AND ca.status = 'active'
+    """
+
+# Spelled out rather than a row value comparison, which MySQL does not turn
+# into a range scan
+WARRANTY_EXPIRING_CURSOR_CONDITION = """
+    AND ca.warranty_expiration >= :cursor_expiration
+    AND (
+        ca.warranty_expiration > :cursor_expiration
+        OR ca.customer_id > :cursor_customer_id
+        OR (ca.customer_id = :cursor_customer_id AND ca.customer_appliance_id > :cursor_id)
+    )
+    """
+
+WARRANTY_EXPIRING_ORDER_BY = """
+    ORDER BY ca.warranty_expiration, ca.customer_id, ca.customer_appliance_id
+    LIMIT :limit
+    """
+
+
+def _stream_table_rows(table_name, primary_key, columns, batch_size):
+    pool = get_engine()
+
+    first_batch_query = QueryRegistry.get_keyset_select_statement(
+        table_name, primary_key, columns
+    )
+    next_batch_query = QueryRegistry.get_keyset_select_statement(
+        table_name, primary_key, columns, after_key=True
+    )
+
+    with pool.connect() as db_conn:
+        db_conn = db_conn.execution_options(stream_results=True)
+        last_key = None
+
+        while True:
+            if last_key is None:
+                result = db_conn.execute(
+                    first_batch_query, parameters={"batch_size": batch_size}
+                )
+            else:
+                result = db_conn.execute(
+                    next_batch_query,
+                    parameters={"last_key": last_key, "batch_size": batch_size},
+                )
 
+            row_count = 0
 
-class Appliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
+            for row in result:
+                row_count += 1
+                last_key = row[0]
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+                yield row[1:]
+
+            if row_count < batch_size:
+                break
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
 
+class Appliances:
     def fetch_distinct_appliance_data(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -54,10 +104,7 @@ class Appliances:
         return result
 
     def fetch_distinct_appliance_data_with_category(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -86,10 +133,7 @@ class Appliances:
         return result
 
     def fetch_distinct_appliance_categories(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -106,10 +150,7 @@ class Appliances:
 
     def fetch_distinct_appliance_sub_categories_by_category(
             self, category=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             if category:
@@ -139,10 +180,7 @@ class Appliances:
             return sub_categories
 
     def fetch_category_by_sub_caegory(self, sub_category):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -160,10 +198,7 @@ class Appliances:
             return str(result[0])
 
     def fetch_distinct_appliance_brands_by_sub_category(self, sub_category):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -184,10 +219,7 @@ class Appliances:
     def fetch_distinct_model_numbers_by_brand_and_sub_category(
         self, brand, sub_category
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -210,10 +242,7 @@ class Appliances:
     def fetch_warranty_period_and_appliance_image_url_by_brand_sub_category_and_model_number(
         self, brand, sub_category, model_number
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -238,17 +267,16 @@ class Appliances:
             return int(result[0]), result[1]
 
     def fetch_best_appliances_by_energy_rating(self, count):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
                 """
                 SELECT category, model_number, brand, appliance_image_url
                 FROM appliances
-                WHERE appliance_id IN (5, 35, 80, 160)
+                WHERE availability_status = 'available'
+                ORDER BY energy_rating DESC, launch_date DESC
+                LIMIT :count
                 """
             )
 
@@ -262,47 +290,25 @@ class Appliances:
         return result
 
     def fetch_all_appliances(self, columns=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
-            if columns:
-                query = sqlalchemy.text(
-                    f"SELECT {', '.join(columns)} FROM appliances")
-            else:
-                query = sqlalchemy.text("SELECT * FROM appliances")
+            query = QueryRegistry.get_select_statement("appliances", columns)
 
             result = db_conn.execute(query).fetchall()
             return result
 
-
-class QueryCustomerAppliances:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+    def stream_all_appliances(self, columns=None, batch_size=1000):
+        return _stream_table_rows(
+            "appliances", "appliance_id", columns, batch_size
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
-
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
 
+class QueryCustomerAppliances:
+    @memoize("customer_appliances", key_argument="customer_id")
     def fetch_customer_appliance_data_by_customer_id(
             self, customer_id, limit=4):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             if limit == -1:
@@ -355,12 +361,133 @@ class QueryCustomerAppliances:
 
         return customer_appliances
 
+    @memoize("customer_appliances", key_argument="customer_id")
+    def fetch_customer_appliances_page(self, customer_id, limit=4, cursor=None):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            if cursor:
+                query = sqlalchemy.text(
+                    """
+                    SELECT category, sub_category, brand, model_number, serial_number, purchased_from, seller, purchase_date, installation_date, warranty_period, warranty_expiration, appliance_image_url, created_on, customer_appliance_id
+                    FROM customer_appliances
+                    WHERE customer_id = :customer_id
+                    AND (created_on < :cursor_created_on OR (created_on = :cursor_created_on AND customer_appliance_id < :cursor_id))
+                    ORDER BY created_on DESC, customer_appliance_id DESC
+                    LIMIT :limit
+                    """
+                )
+
+            else:
+                query = sqlalchemy.text(
+                    """
+                    SELECT category, sub_category, brand, model_number, serial_number, purchased_from, seller, purchase_date, installation_date, warranty_period, warranty_expiration, appliance_image_url, created_on, customer_appliance_id
+                    FROM customer_appliances
+                    WHERE customer_id = :customer_id
+                    ORDER BY created_on DESC, customer_appliance_id DESC
+                    LIMIT :limit
+                    """
+                )
+
+            # Fetch one extra row to find out whether another page exists
+            result = db_conn.execute(
+                query,
+                parameters={
+                    "customer_id": customer_id,
+                    "limit": limit + 1,
+                    "cursor_created_on": cursor[0] if cursor else None,
+                    "cursor_id": cursor[1] if cursor else None,
+                },
+            ).fetchall()
+
+        customer_appliances = []
+
+        for row in result[:limit]:
+            customer_appliances.append(
+                {
+                    "category": row[0],
+                    "sub_category": row[1],
+                    "brand": row[2],
+                    "model_number": row[3],
+                    "serial_number": row[4],
+                    "purchased_from": row[5],
+                    "seller": row[6],
+                    "purchase_date": row[7],
+                    "installation_date": row[8],
+                    "warranty_period": row[9],
+                    "warranty_expiration": row[10],
+                    "appliance_image_url": row[11],
+                }
+            )
+
+        next_cursor = None
+
+        if len(result) > limit:
+            next_cursor = (result[limit - 1][12], result[limit - 1][13])
+
+        return customer_appliances, next_cursor
+
+    def fetch_appliances_with_warranty_expiring_between(
+        self, start_date, end_date, limit=1000, cursor=None
+    ):
+        pool = get_engine()
+
+        query = WARRANTY_EXPIRING_QUERY
+
+        if cursor:
+            query += WARRANTY_EXPIRING_CURSOR_CONDITION
+
+        query += WARRANTY_EXPIRING_ORDER_BY
+
+        with pool.connect() as db_conn:
+            result = db_conn.execute(
+                sqlalchemy.text(query),
+                parameters={
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    # One extra row tells whether another page exists
+                    "limit": limit + 1,
+                    "cursor_expiration": cursor[0] if cursor else None,
+                    "cursor_customer_id": cursor[1] if cursor else None,
+                    "cursor_id": cursor[2] if cursor else None,
+                },
+            ).mappings().fetchall()
+
+        expiring_appliances = [dict(row) for row in result[:limit]]
+
+        next_cursor = None
+
+        if len(result) > limit:
+            last_appliance = expiring_appliances[-1]
+            next_cursor = (
+                last_appliance["warranty_expiration"],
+                last_appliance["customer_id"],
+                last_appliance["customer_appliance_id"],
+            )
+
+        return expiring_appliances, next_cursor
+
+    def stream_appliances_with_warranty_expiring_between(
+        self, start_date, end_date, batch_size=1000
+    ):
+        cursor = None
+
+        while True:
+            expiring_appliances, cursor = (
+                self.fetch_appliances_with_warranty_expiring_between(
+                    start_date, end_date, limit=batch_size, cursor=cursor
+                )
+            )
+
+            yield from expiring_appliances
+
+            if cursor is None:
+                break
+
+    @memoize("customer_appliances", key_argument="customer_id")
     def fetch_appliance_serial_numbers_by_customer_id(
             self, customer_id, limit=4):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             if limit == -1:
@@ -391,18 +518,14 @@ class QueryCustomerAppliances:
             serial_number = [serial_number[0] for serial_number in result]
             return serial_number
 
+    @memoize("customer_appliances", key_argument="customer_id")
     def fetch_customer_appliance_details_by_customer_id_serial_number(
-        self, customer_id, serial_number
+        self, customer_id, serial_number, db_conn=None
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
-
         # appliance_image_url, sub_category, brand, category, model_number, purchased_from,
         # seller, purchase_date, installation_date, warranty_period, warranty_expiry,
 
-        with pool.connect() as db_conn:
+        with connect(db_conn) as db_conn:
             query = sqlalchemy.text(
                 """
                 SELECT category, sub_category, brand, model_number, purchased_from, seller, purchase_date, installation_date, warranty_period, warranty_expiration, appliance_image_url
@@ -437,30 +560,79 @@ class QueryCustomerAppliances:
             return customer_appliance_details
 
 
-class QueryCustomers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
-        )
+    def count_customer_appliances(self):
+        pool = get_engine()
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text("SELECT COUNT(*) FROM customer_appliances")
+            result = db_conn.execute(query).fetchone()
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
+            return int(result[0])
+
+    def stream_all_serial_numbers(self, batch_size=10000):
+        for (serial_number,) in _stream_table_rows(
+            "customer_appliances",
+            "customer_appliance_id",
+            ["serial_number"],
+            batch_size,
+        ):
+            yield serial_number
+
+    def fetch_customer_appliance_by_serial_number(self, serial_number):
+        pool = get_engine()
+
+        # Served by the unique index on serial_number, across all customers
+        with pool.connect() as db_conn:
+            query = QueryRegistry.get_select_statement(
+                "customer_appliances", where_columns=["serial_number"]
+            )
+
+            result = db_conn.execute(
+                query, parameters={"serial_number": serial_number}
+            ).fetchone()
 
+        if result is None:
+            return None
+
+        return dict(zip(TABLE_COLUMNS["customer_appliances"], result))
+
+    def might_serial_number_exist(self, serial_number):
+        # The bloom filter is per process and rebuilt periodically, so its
+        # negatives can miss serial numbers registered elsewhere. Only for
+        # form checks where the UNIQUE index still guards the insert.
+        if not SerialNumberFilter.might_contain(
+            serial_number,
+            lambda: (
+                self.count_customer_appliances(),
+                self.stream_all_serial_numbers(),
+            ),
+        ):
+            return False
+
+        return self.check_serial_number_exists(serial_number)
+
+    def check_serial_number_exists(self, serial_number):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text(
+                """
+                SELECT EXISTS (
+                    SELECT 1 FROM customer_appliances WHERE serial_number = :serial_number
+                )
+                """
+            )
+
+            result = db_conn.execute(
+                query, parameters={"serial_number": serial_number}
+            ).fetchone()
+
+            return result[0] == 1
+
+
+class QueryCustomers:
     def check_customer_exists_by_email(self, email):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -473,104 +645,63 @@ class QueryCustomers:
 
             return result[0] == 1
 
-    def fetch_customer_details_by_username(self, username, columns=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+    def _fetch_customer_profile(self, username):
+        pool = get_engine()
 
         with pool.connect() as db_conn:
-            if columns:
-                query = sqlalchemy.text(
-                    f"SELECT {
-                        ', '.join(columns)} FROM customers WHERE username = :username"
-                )
-            else:
-                query = sqlalchemy.text(
-                    "SELECT * FROM customers WHERE username = :username"
-                )
+            query = QueryRegistry.get_select_statement(
+                "customers", where_columns=["username"]
+            )
 
             result = db_conn.execute(
                 query, parameters={"username": username}
             ).fetchone()
 
-            results_map = {}
-
-            if columns:
-                try:
-                    for idx, column in enumerate(columns):
-                        results_map[column] = result[idx]
+        if result is None:
+            return None
 
-                except Exception as error:
-                    pass
+        return dict(zip(TABLE_COLUMNS["customers"], result))
 
-            else:
-                try:
-                    results_map = {
-                        "customer_id": result[0],
-                        "first_name": result[1],
-                        "last_name": result[2],
-                        "dob": result[3],
-                        "gender": result[4],
-                        "email": result[5],
-                        "phone_number": result[6],
-                        "profile_picture": result[7],
-                        "street": result[8],
-                        "district": result[9],
-                        "city": result[10],
-                        "state": result[11],
-                        "country": result[12],
-                        "zip_code": result[13],
-                        "created_at": result[14],
-                    }
-
-                except Exception as error:
-                    pass
-
-            return results_map
-        
-    def fetch_all_customers(self, columns=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
+    def fetch_customer_details_by_username(self, username, columns=None):
+        profile = customer_profile_cache.get(
+            username, lambda: self._fetch_customer_profile(username)
         )
 
+        if profile is None:
+            return {}
+
         if columns:
-            query = sqlalchemy.text(
-                f"SELECT {', '.join(columns)} FROM customers")
-        else:
-            query = sqlalchemy.text("SELECT * FROM customers")
+            QueryRegistry.validate_columns("customers", columns)
+            return {column: profile[column] for column in columns}
+
+        # Full profiles have always exposed the username as customer_id
+        return {
+            "customer_id" if column == "username" else column: value
+            for column, value in profile.items()
+        }
+
+    def fetch_all_customers(self, columns=None):
+        pool = get_engine()
+
+        query = QueryRegistry.get_select_statement("customers", columns)
 
         with pool.connect() as db_conn:
             result = db_conn.execute(query)
 
         return result.fetchall()
 
+    def get_profile_cache_stats(self):
+        return customer_profile_cache.get_stats()
 
-class QueryEngineers:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+    def stream_all_customers(self, columns=None, batch_size=1000):
+        return _stream_table_rows(
+            "customers", "username", columns, batch_size
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
-
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
-        )
-        return conn
 
+class QueryEngineers:
     def check_engineer_exists_by_email(self, email):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -583,75 +714,44 @@ class QueryEngineers:
 
             return result[0] == 1
 
-    def fetch_engineer_details_by_id(self, engineer_id, columns=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+    def _fetch_engineer_profile(self, engineer_id):
+        pool = get_engine()
 
         with pool.connect() as db_conn:
-            if columns:
-                query = sqlalchemy.text(
-                    f"SELECT {
-                        ', '.join(columns)} FROM engineers WHERE engineer_id = :engineer_id"
-                )
-            else:
-                query = sqlalchemy.text(
-                    "SELECT * FROM engineers WHERE engineer_id = :engineer_id"
-                )
+            query = QueryRegistry.get_select_statement(
+                "engineers", where_columns=["engineer_id"]
+            )
 
             result = db_conn.execute(
                 query, parameters={"engineer_id": engineer_id}
             ).fetchone()
 
-            results_map = {}
+        if result is None:
+            return None
 
-            if columns:
-                try:
-                    for idx, column in enumerate(columns):
-                        results_map[column] = result[idx]
+        return dict(zip(TABLE_COLUMNS["engineers"], result))
 
-                except Exception as error:
-                    pass
+    def fetch_engineer_details_by_id(self, engineer_id, columns=None):
+        profile = engineer_profile_cache.get(
+            engineer_id, lambda: self._fetch_engineer_profile(engineer_id)
+        )
+
+        if profile is None:
+            return {}
+
+        if columns:
+            QueryRegistry.validate_columns("engineers", columns)
+            return {column: profile[column] for column in columns}
+
+        return dict(profile)
+
+    def get_profile_cache_stats(self):
+        return engineer_profile_cache.get_stats()
 
-            else:
-                try:
-                    results_map = {
-                        "engineer_id": result[0],
-                        "first_name": result[1],
-                        "last_name": result[2],
-                        "email": result[3],
-                        "phone_number": result[4],
-                        "availability": result[5],
-                        "active_tickets": result[6],
-                        "street": result[7],
-                        "city": result[8],
-                        "district": result[9],
-                        "state": result[10],
-                        "country": result[11],
-                        "zip_code": result[12],
-                        "specializations": result[13],
-                        "skills": result[14],
-                        "rating": result[15],
-                        "training_id": result[16],
-                        "reward_points": result[17],
-                        "profile_picture": result[18],
-                        "language_proficiency": result[19],
-                        "created_on": result[20],
-                    }
-
-                except Exception as error:
-                    pass
-
-            return results_map
-        
     def fetch_available_engineer_for_service_request(
         self, district, specialization, skill
     ):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -678,47 +778,146 @@ class QueryEngineers:
             else:
                 return []
 
+    def fetch_available_engineers_with_skills(self):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text(
+                """
+                SELECT engineers.engineer_id, street, city, district, state, zip_code, specializations, skills, engineer_coordinates.address, latitude, longitude
+                FROM engineers
+                LEFT JOIN engineer_coordinates ON engineer_coordinates.engineer_id = engineers.engineer_id
+                WHERE availability = True
+                """
+            )
+
+            result = db_conn.execute(query).fetchall()
+
+        available_engineers = []
+
+        for row in result:
+            specializations, skills = row[6], row[7]
+
+            available_engineers.append(
+                {
+                    "engineer_id": row[0],
+                    "street": row[1],
+                    "city": row[2],
+                    "district": row[3],
+                    "state": row[4],
+                    "zip_code": row[5],
+                    "specializations": (
+                        json.loads(specializations)
+                        if isinstance(specializations, str)
+                        else specializations
+                    ),
+                    "skills": json.loads(skills) if isinstance(skills, str) else skills,
+                    "geocoded_address": row[8],
+                    "coordinates": (row[9], row[10]) if row[8] else None,
+                }
+            )
+
+        return available_engineers
+
+    def fetch_available_engineer_ids(self, engineer_ids):
+        if not engineer_ids:
+            return set()
+
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text(
+                """
+                SELECT engineer_id
+                FROM engineers
+                WHERE availability = True AND engineer_id IN :engineer_ids
+                """
+            ).bindparams(sqlalchemy.bindparam("engineer_ids", expanding=True))
+
+            result = db_conn.execute(
+                query, parameters={"engineer_ids": list(engineer_ids)}
+            ).fetchall()
+
+        return {row[0] for row in result}
+
     def fetch_all_engineers(self, columns=None):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
-            if columns:
-                query = sqlalchemy.text(
-                    f"SELECT {', '.join(columns)} FROM engineers")
-            else:
-                query = sqlalchemy.text("SELECT * FROM engineers")
+            query = QueryRegistry.get_select_statement("engineers", columns)
 
             result = db_conn.execute(query)
             return result.fetchall()
 
-
-class QueryServiceGuides:
-    def __init__(self):
-        credentials = Credentials.from_service_account_file(
-            "config/cloud_sql_editor_service_account_key.json"
+    def stream_all_engineers(self, columns=None, batch_size=1000):
+        return _stream_table_rows(
+            "engineers", "engineer_id", columns, batch_size
         )
 
-        self.connector = Connector(credentials=credentials)
-        self.db_password = st.secrets["CLOUD_SQL_PASSWORD"]
+    def _to_district_stats(self, row):
+        district_stats = dict(zip(TABLE_COLUMNS["engineer_district_stats"], row))
+        rating_sum = district_stats.pop("rating_sum")
 
-    def _get_connection(self):
-        conn = self.connector.connect(
-            "logiq-project:us-central1:logiq-mysql-db",
-            "pymysql",
-            user="root",
-            password=self.db_password,
-            db="logiq_db",
+        district_stats["mean_rating"] = (
+            round(rating_sum / district_stats["engineer_count"], 2)
+            if district_stats["engineer_count"]
+            else None
         )
-        return conn
-    
+
+        return district_stats
+
+    def fetch_district_stats(self, district):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = QueryRegistry.get_select_statement(
+                "engineer_district_stats", where_columns=["district"]
+            )
+
+            result = db_conn.execute(
+                query, parameters={"district": district}
+            ).fetchone()
+
+        if result is None:
+            return None
+
+        return self._to_district_stats(result)
+
+    def fetch_all_district_stats(self):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = QueryRegistry.get_select_statement(
+                "engineer_district_stats", suffix="ORDER BY district"
+            )
+
+            result = db_conn.execute(query).fetchall()
+
+        return [self._to_district_stats(row) for row in result]
+
+    def fetch_engineer_leaderboard(self, district, limit=10):
+        pool = get_engine()
+
+        # Served by idx_engineers_district_reward_points
+        with pool.connect() as db_conn:
+            query = QueryRegistry.get_select_statement(
+                "engineers",
+                ["engineer_id", "first_name", "last_name", "rating", "reward_points"],
+                where_columns=["district"],
+                suffix="ORDER BY reward_points DESC LIMIT :limit",
+            )
+
+            result = db_conn.execute(
+                query, parameters={"district": district, "limit": limit}
+            ).mappings().fetchall()
+
+        return [dict(row) for row in result]
+
+
+class QueryServiceGuides:
+    @memoize("service_guides", key_argument="model_number")
     def fetch_guide_by_model_number(self, model_number):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text(
@@ -735,11 +934,9 @@ class QueryServiceGuides:
 
             return result
 
+    @memoize("service_guides")
     def fetch_model_number_of_all_guides(self):
-        pool = sqlalchemy.create_engine(
-            "mysql+pymysql://",
-            creator=self._get_connection,
-        )
+        pool = get_engine()
 
         with pool.connect() as db_conn:
             query = sqlalchemy.text("SELECT model_number FROM service_guides")
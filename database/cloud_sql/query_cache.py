@@ -0,0 +1,169 @@
+import copy
+import time
+import inspect
+import functools
+import threading
+
+from collections import OrderedDict
+
+
+class QueryCache:
+    def __init__(self, max_size=4096, ttl_seconds=300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._dependents = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _remove_entry(self, key):
+        _, _, dependencies = self._entries.pop(key)
+
+        for dependency in dependencies:
+            dependents = self._dependents.get(dependency)
+
+            if dependents is not None:
+                dependents.discard(key)
+
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def get(self, key, dependencies, loader, ttl_seconds=None):
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+
+                return copy.deepcopy(entry[1])
+
+            self._misses += 1
+
+            generations = [
+                self._generations.get(table, 0) for table, _ in dependencies
+            ]
+
+        value = loader()
+
+        with self._lock:
+            # A write to any dependency while loading may have made the value
+            # stale already, hand it back without caching it
+            if generations != [
+                self._generations.get(table, 0) for table, _ in dependencies
+            ]:
+                return value
+
+            if key in self._entries:
+                self._remove_entry(key)
+
+            self._entries[key] = (
+                time.monotonic() + (ttl_seconds or self.ttl_seconds),
+                copy.deepcopy(value),
+                dependencies,
+            )
+
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                self._remove_entry(next(iter(self._entries)))
+                self._evictions += 1
+
+        return value
+
+    def invalidate(self, table, *row_keys):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+
+            # Entries keyed to other rows survive a write to specific rows,
+            # entries that read the whole table never do
+            if row_keys:
+                dependencies = [(table, None)] + [
+                    (table, row_key) for row_key in row_keys
+                ]
+            else:
+                dependencies = [
+                    dependency
+                    for dependency in self._dependents
+                    if dependency[0] == table
+                ]
+
+            for dependency in dependencies:
+                for key in self._dependents.pop(dependency, ()):
+                    if key in self._entries:
+                        self._remove_entry(key)
+                        self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            for table in {table for table, _ in self._dependents}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+            self._entries.clear()
+            self._dependents.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+query_cache = QueryCache()
+
+
+def memoize(*tables, key_argument=None, ttl_seconds=None):
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            arguments = signature.bind(self, *args, **kwargs)
+            arguments.apply_defaults()
+
+            # Reads inside a unit of work must see its uncommitted writes
+            if arguments.arguments.get("db_conn") is not None:
+                return method(self, *args, **kwargs)
+
+            key = (
+                method.__qualname__,
+                tuple(arguments.arguments.items())[1:],
+            )
+
+            try:
+                hash(key)
+
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            row_key = arguments.arguments[key_argument] if key_argument else None
+            dependencies = tuple((table, row_key) for table in tables)
+
+            return query_cache.get(
+                key,
+                dependencies,
+                lambda: method(self, *args, **kwargs),
+                ttl_seconds,
+            )
+
+        return wrapper
+
+    return decorator
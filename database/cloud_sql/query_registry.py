@@ -0,0 +1,189 @@
+import threading
+import sqlalchemy
+
+
+# Column order mirrors the CREATE TABLE statements in models.py
+TABLE_COLUMNS = {
+    "appliances": (
+        "appliance_id",
+        "model_number",
+        "appliance_name",
+        "brand",
+        "category",
+        "sub_category",
+        "appliance_image_url",
+        "warranty_period",
+        "launch_date",
+        "energy_rating",
+        "availability_status",
+        "created_at",
+        "updated_at",
+    ),
+    "customer_appliances": (
+        "customer_appliance_id",
+        "customer_id",
+        "category",
+        "sub_category",
+        "brand",
+        "model_number",
+        "serial_number",
+        "purchase_date",
+        "warranty_period",
+        "warranty_expiration",
+        "purchased_from",
+        "seller",
+        "installation_date",
+        "created_on",
+        "updated_on",
+        "status",
+        "appliance_image_url",
+    ),
+    "customers": (
+        "username",
+        "first_name",
+        "last_name",
+        "dob",
+        "gender",
+        "email",
+        "phone_number",
+        "profile_picture",
+        "street",
+        "district",
+        "city",
+        "state",
+        "country",
+        "zip_code",
+        "created_at",
+    ),
+    "engineers": (
+        "engineer_id",
+        "first_name",
+        "last_name",
+        "email",
+        "phone_number",
+        "availability",
+        "active_tickets",
+        "street",
+        "city",
+        "district",
+        "state",
+        "country",
+        "zip_code",
+        "specializations",
+        "skills",
+        "rating",
+        "training_id",
+        "reward_points",
+        "profile_picture",
+        "language_proficiency",
+        "created_on",
+    ),
+    "service_guides": (
+        "guide_id",
+        "model_number",
+        "guide_name",
+        "guide_file_url",
+        "created_at",
+        "updated_at",
+    ),
+    "engineer_district_stats": (
+        "district",
+        "engineer_count",
+        "available_count",
+        "rating_sum",
+        "active_tickets_total",
+        "reward_points_total",
+        "updated_on",
+    ),
+}
+
+
+class QueryRegistry:
+    _statements = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def validate_columns(cls, table_name, columns):
+        if table_name not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table_name}")
+
+        invalid_columns = [
+            column for column in columns if column not in TABLE_COLUMNS[table_name]
+        ]
+
+        if invalid_columns:
+            raise ValueError(
+                f"Unknown columns for {table_name}: {', '.join(map(str, invalid_columns))}"
+            )
+
+        return tuple(columns)
+
+    @classmethod
+    def get_select_statement(
+        cls, table_name, columns=None, where_columns=(), suffix=""
+    ):
+        cache_key = (
+            table_name,
+            tuple(columns) if columns else None,
+            tuple(where_columns),
+            suffix,
+        )
+
+        statement = cls._statements.get(cache_key)
+
+        if statement is None:
+            selected_columns = cls.validate_columns(
+                table_name, columns or TABLE_COLUMNS[table_name]
+            )
+            cls.validate_columns(table_name, where_columns)
+
+            query = f"SELECT {', '.join(selected_columns)} FROM {table_name}"
+
+            if where_columns:
+                query += " WHERE " + " AND ".join(
+                    f"{column} = :{column}" for column in where_columns
+                )
+
+            if suffix:
+                query += f" {suffix}"
+
+            statement = sqlalchemy.text(query)
+
+            with cls._lock:
+                cls._statements.setdefault(cache_key, statement)
+
+        return statement
+
+    @classmethod
+    def get_keyset_select_statement(
+        cls, table_name, primary_key, columns=None, after_key=False
+    ):
+        cache_key = (
+            "keyset",
+            table_name,
+            primary_key,
+            tuple(columns) if columns else None,
+            after_key,
+        )
+
+        statement = cls._statements.get(cache_key)
+
+        if statement is None:
+            cls.validate_columns(table_name, [primary_key])
+            selected_columns = cls.validate_columns(
+                table_name, columns or TABLE_COLUMNS[table_name]
+            )
+
+            query = f"SELECT {primary_key}, {', '.join(selected_columns)} FROM {table_name}"
+
+            if after_key:
+                query += f" WHERE {primary_key} > :last_key"
+
+            query += f" ORDER BY {primary_key} LIMIT :batch_size"
+
+            statement = sqlalchemy.text(query)
+
+            with cls._lock:
+                cls._statements.setdefault(cache_key, statement)
+
+        return statement
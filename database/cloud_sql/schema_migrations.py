@@ -0,0 +1,348 @@
+import sys
+import sqlalchemy
+
+from database.cloud_sql.backend import get_engine
+from database.cloud_sql.district_stats import ENGINEER_DISTRICT_STATS_BACKFILL
+from database.cloud_sql.queries import (
+    WARRANTY_EXPIRING_CURSOR_CONDITION,
+    WARRANTY_EXPIRING_ORDER_BY,
+    WARRANTY_EXPIRING_QUERY,
+)
+
+
+# Each migration is applied once, in version order, and recorded in the
+# schema_migrations table. Never edit an applied migration, add a new one.
+MIGRATIONS = [
+    (
+        1,
+        "Index customer appliances by customer and creation time",
+        [
+            """
+            CREATE INDEX idx_customer_appliances_customer_created_on
+            ON customer_appliances (customer_id, created_on, customer_appliance_id)
+            """,
+            """
+            CREATE INDEX idx_customer_appliances_customer_installation_date
+            ON customer_appliances (customer_id, installation_date)
+            """,
+        ],
+    ),
+    (
+        2,
+        "Index appliances by sub category, brand and category",
+        [
+            """
+            CREATE INDEX idx_appliances_sub_category_brand_model_number
+            ON appliances (sub_category, brand, model_number)
+            """,
+            """
+            CREATE INDEX idx_appliances_category_sub_category
+            ON appliances (category, sub_category)
+            """,
+        ],
+    ),
+    (
+        3,
+        "Index engineers by district and availability",
+        [
+            """
+            CREATE INDEX idx_engineers_district_availability_active_tickets
+            ON engineers (district, availability, active_tickets)
+            """,
+        ],
+    ),
+    (
+        4,
+        "Index customer appliances by warranty expiration",
+        [
+            """
+            CREATE INDEX idx_customer_appliances_warranty_expiration
+            ON customer_appliances (warranty_expiration, customer_id, customer_appliance_id)
+            """,
+        ],
+    ),
+    (
+        5,
+        "Add per district engineer aggregates and index the leaderboard",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS engineer_district_stats (
+                district VARCHAR(255) PRIMARY KEY,
+                engineer_count INTEGER DEFAULT 0 NOT NULL,
+                available_count INTEGER DEFAULT 0 NOT NULL,
+                rating_sum DOUBLE DEFAULT 0 NOT NULL,
+                active_tickets_total INTEGER DEFAULT 0 NOT NULL,
+                reward_points_total BIGINT DEFAULT 0 NOT NULL,
+                updated_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL
+            )
+            """,
+            ENGINEER_DISTRICT_STATS_BACKFILL,
+            """
+            CREATE INDEX idx_engineers_district_reward_points
+            ON engineers (district, reward_points)
+            """,
+        ],
+    ),
+    (
+        6,
+        "Index exported tables by creation time and primary key",
+        [
+            """
+            CREATE INDEX idx_appliances_created_at_appliance_id
+            ON appliances (created_at, appliance_id)
+            """,
+            """
+            CREATE INDEX idx_customer_appliances_created_on_customer_appliance_id
+            ON customer_appliances (created_on, customer_appliance_id)
+            """,
+            """
+            CREATE INDEX idx_customers_created_at_username
+            ON customers (created_at, username)
+            """,
+            """
+            CREATE INDEX idx_engineers_created_on_engineer_id
+            ON engineers (created_on, engineer_id)
+            """,
+        ],
+    ),
+    (
+        7,
+        "Persist geocoded engineer coordinates",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS engineer_coordinates (
+                engineer_id VARCHAR(255) PRIMARY KEY,
+                address VARCHAR(1024) NOT NULL,
+                latitude DOUBLE NOT NULL,
+                longitude DOUBLE NOT NULL,
+                geocoded_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL
+            )
+            """,
+        ],
+    ),
+]
+
+# Lookups issued by queries.py that must never fall back to a full table scan
+HOT_QUERIES = {
+    "customer_appliances_by_customer_id": (
+        """
+        SELECT category, sub_category, brand, model_number, serial_number
+        FROM customer_appliances
+        WHERE customer_id = :customer_id
+        ORDER BY created_on DESC
+        """,
+        {"customer_id": "logiq_user"},
+    ),
+    "customer_appliance_serial_numbers_by_installation_date": (
+        """
+        SELECT serial_number
+        FROM customer_appliances
+        WHERE customer_id = :customer_id
+        ORDER BY installation_date DESC
+        LIMIT 4
+        """,
+        {"customer_id": "logiq_user"},
+    ),
+    "customer_appliance_by_serial_number": (
+        """
+        SELECT customer_appliance_id, customer_id
+        FROM customer_appliances
+        WHERE serial_number = :serial_number
+        """,
+        {"serial_number": "SN0000"},
+    ),
+    "customer_appliance_by_customer_id_and_serial_number": (
+        """
+        SELECT category, sub_category, brand, model_number
+        FROM customer_appliances
+        WHERE customer_id = :customer_id
+        AND serial_number = :serial_number
+        """,
+        {"customer_id": "logiq_user", "serial_number": "SN0000"},
+    ),
+    "customer_appliances_by_warranty_expiration": (
+        WARRANTY_EXPIRING_QUERY
+        + WARRANTY_EXPIRING_CURSOR_CONDITION
+        + WARRANTY_EXPIRING_ORDER_BY,
+        {
+            "start_date": "2025-01-01",
+            "end_date": "2025-12-31",
+            "cursor_expiration": "2025-01-01",
+            "cursor_customer_id": "logiq_user",
+            "cursor_id": 0,
+            "limit": 1001,
+        },
+    ),
+    "appliance_brands_by_sub_category": (
+        """
+        SELECT DISTINCT brand
+        FROM appliances
+        WHERE sub_category = :sub_category
+        """,
+        {"sub_category": "Refrigerator"},
+    ),
+    "appliance_model_numbers_by_brand_and_sub_category": (
+        """
+        SELECT DISTINCT model_number
+        FROM appliances
+        WHERE brand = :brand
+        AND sub_category = :sub_category
+        """,
+        {"brand": "Maytag", "sub_category": "Refrigerator"},
+    ),
+    "appliance_sub_categories_by_category": (
+        """
+        SELECT DISTINCT sub_category
+        FROM appliances
+        WHERE category = :category
+        """,
+        {"category": "Kitchen Appliances"},
+    ),
+    "service_guide_by_model_number": (
+        """
+        SELECT guide_name, guide_file_url
+        FROM service_guides
+        WHERE model_number = :model_number
+        """,
+        {"model_number": "MDL0000"},
+    ),
+    "available_engineers_by_district": (
+        """
+        SELECT engineer_id
+        FROM engineers
+        WHERE availability = True AND district = :district
+        ORDER BY active_tickets ASC
+        LIMIT 10
+        """,
+        {"district": "Ernakulam"},
+    ),
+    "analytics_export_customers_batch": (
+        """
+        SELECT username, created_at
+        FROM customers
+        WHERE created_at >= :watermark
+        AND (created_at > :watermark OR username > :last_key)
+        ORDER BY created_at, username
+        LIMIT 10000
+        """,
+        {"watermark": "2025-01-01 00:00:00", "last_key": "logiq_user"},
+    ),
+    "engineer_leaderboard_by_district": (
+        """
+        SELECT engineer_id, reward_points
+        FROM engineers
+        WHERE district = :district
+        ORDER BY reward_points DESC
+        LIMIT 10
+        """,
+        {"district": "Ernakulam"},
+    ),
+}
+
+
+class SchemaMigrations:
+    def create_table(self):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_on TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+                );
+                """
+            )
+            db_conn.execute(query)
+            db_conn.commit()
+
+    def fetch_applied_versions(self):
+        pool = get_engine()
+
+        with pool.connect() as db_conn:
+            query = sqlalchemy.text("SELECT version FROM schema_migrations")
+            result = db_conn.execute(query).fetchall()
+
+        return {version[0] for version in result}
+
+    def apply_pending_migrations(self):
+        self.create_table()
+        applied_versions = self.fetch_applied_versions()
+
+        pool = get_engine()
+
+        newly_applied_versions = []
+
+        with pool.connect() as db_conn:
+            for version, description, statements in sorted(MIGRATIONS):
+                if version in applied_versions:
+                    continue
+
+                for statement in statements:
+                    db_conn.execute(sqlalchemy.text(statement))
+
+                db_conn.execute(
+                    sqlalchemy.text(
+                        """
+                        INSERT INTO schema_migrations (version, description)
+                        VALUES (:version, :description)
+                        """
+                    ),
+                    parameters={"version": version,
+                                "description": description},
+                )
+                db_conn.commit()
+
+                newly_applied_versions.append(version)
+
+        return newly_applied_versions
+
+    def find_full_scan_queries(self):
+        pool = get_engine()
+
+        full_scan_queries = {}
+
+        with pool.connect() as db_conn:
+            for query_name, (query, parameters) in HOT_QUERIES.items():
+                query_plan = db_conn.execute(
+                    sqlalchemy.text(f"EXPLAIN {query}"), parameters=parameters
+                ).mappings().fetchall()
+
+                if pool.dialect.name == "sqlite":
+                    # SQLite reports SCAN <table> for a full table scan and
+                    # SCAN <table> USING INDEX for a full index scan
+                    scanned_tables = [
+                        step["detail"].split()[1]
+                        for step in query_plan
+                        if step["detail"].startswith("SCAN ")
+                    ]
+
+                else:
+                    # MySQL reports access type ALL for a full table scan and
+                    # index for a full index scan, both read every row
+                    scanned_tables = [
+                        step["table"]
+                        for step in query_plan
+                        if step["type"] in ("ALL", "index")
+                    ]
+
+                if scanned_tables:
+                    full_scan_queries[query_name] = scanned_tables
+
+        return full_scan_queries
+
+
+if __name__ == "__main__":
+    schema_migrations = SchemaMigrations()
+
+    applied_versions = schema_migrations.apply_pending_migrations()
+    print("Applied migrations:", applied_versions or "none pending")
+
+    full_scan_queries = schema_migrations.find_full_scan_queries()
+
+    for query_name, scanned_tables in full_scan_queries.items():
+        print(f"Full table scan in {query_name}: {', '.join(scanned_tables)}")
+
+    if full_scan_queries:
+        sys.exit(1)
@@ -0,0 +1,138 @@
+import math
+import time
+import hashlib
+import threading
+
+
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate=0.01):
+        self.capacity = capacity
+        self.bit_count = math.ceil(
+            -capacity * math.log(false_positive_rate) / math.log(2) ** 2
+        )
+        self.hash_count = max(
+            1, round(self.bit_count / capacity * math.log(2)))
+        self.count = 0
+
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _get_positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+
+        # Double hashing derives all probe positions from one digest
+        first_hash = int.from_bytes(digest[:8], "little")
+        second_hash = int.from_bytes(digest[8:], "little") | 1
+
+        return [
+            (first_hash + idx * second_hash) % self.bit_count
+            for idx in range(self.hash_count)
+        ]
+
+    def add(self, value):
+        for position in self._get_positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._get_positions(value)
+        )
+
+
+class SerialNumberFilter:
+    MIN_CAPACITY = 100000
+    TTL_SECONDS = 600
+
+    _bloom_filter = None
+    _built_on = 0
+    _generation = 0
+    _pending_serial_numbers = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(serial_number):
+        # MySQL compares serial numbers case-insensitively, so must the filter
+        return serial_number.strip().casefold()
+
+    @classmethod
+    def _build(cls, serial_number_count, serial_numbers):
+        # Leave room to keep adding new registrations until the next rebuild
+        bloom_filter = BloomFilter(
+            max(cls.MIN_CAPACITY, 2 * serial_number_count))
+
+        for serial_number in serial_numbers:
+            bloom_filter.add(cls._normalize(serial_number))
+
+        return bloom_filter
+
+    @classmethod
+    def _is_stale(cls):
+        return (
+            cls._bloom_filter is None
+            or cls._bloom_filter.count > cls._bloom_filter.capacity
+            or time.time() - cls._built_on >= cls.TTL_SECONDS
+        )
+
+    @classmethod
+    def _rebuild(cls, generation, load_serial_numbers):
+        try:
+            bloom_filter = cls._build(*load_serial_numbers())
+
+        except Exception as error:
+            bloom_filter = None
+
+        with cls._lock:
+            pending_serial_numbers = cls._pending_serial_numbers
+            cls._pending_serial_numbers = None
+
+            # An invalidate() during the build means rows may be missing
+            if bloom_filter is None or generation != cls._generation:
+                return
+
+            # Registrations made while the table was being streamed
+            for serial_number in pending_serial_numbers:
+                bloom_filter.add(serial_number)
+
+            cls._bloom_filter = bloom_filter
+            cls._built_on = time.time()
+
+    @classmethod
+    def might_contain(cls, serial_number, load_serial_numbers):
+        with cls._lock:
+            bloom_filter = cls._bloom_filter
+
+            # Rebuilds stream the whole table, keep them off the request path
+            if cls._is_stale() and cls._pending_serial_numbers is None:
+                cls._pending_serial_numbers = []
+
+                threading.Thread(
+                    target=cls._rebuild,
+                    args=(cls._generation, load_serial_numbers),
+                    daemon=True,
+                ).start()
+
+        # Until the first build lands every serial number is a maybe, the
+        # caller falls back to the UNIQUE index lookup
+        if bloom_filter is None:
+            return True
+
+        return cls._normalize(serial_number) in bloom_filter
+
+    @classmethod
+    def add(cls, serial_number):
+        serial_number = cls._normalize(serial_number)
+
+        with cls._lock:
+            if cls._bloom_filter is not None:
+                cls._bloom_filter.add(serial_number)
+
+            if cls._pending_serial_numbers is not None:
+                cls._pending_serial_numbers.append(serial_number)
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._bloom_filter = None
+            cls._generation += 1
@@ -22,7 +22,9 @@ class OnsiteServiceRequestCollection:
                                    for _ in range(11)])
         return request_id
 
-    def create_onsite_service_request(self, customer_id, service_request_data):
+    def create_onsite_service_request(
+        self, customer_id, service_request_data, batch=None
+    ):
         request_id = self._generate_request_id()
         current_timestamp = datetime.utcnow() + timedelta(hours=5, minutes=30)
 
@@ -77,9 +79,19 @@ class OnsiteServiceRequestCollection:
             "total_cost": "",
         }
 
-        self.db.collection("service_requests").document("onsite").collection(
-            customer_id
-        ).document(request_id).set(onsite_service_request_data)
+        service_request_ref = (
+            self.db.collection("service_requests")
+            .document("onsite")
+            .collection(customer_id)
+            .document(request_id)
+        )
+
+        # Inside a unit of work the write lands when its batch commits
+        if batch is not None:
+            batch.set(service_request_ref, onsite_service_request_data)
+        else:
+            service_request_ref.set(onsite_service_request_data)
+
         return request_id
 
     def update_engineer_for_service_request(
@@ -155,7 +167,7 @@ class OnsiteServiceRequestCollection:
             return False
 
     def update_assignment_status(
-            self, customer_id, service_request_id, status):
+            self, customer_id, service_request_id, status, travel_details=None):
         try:
             service_request_ref = (
                 self.db.collection("service_requests")
@@ -164,11 +176,12 @@ class OnsiteServiceRequestCollection:
                 .document(service_request_id)
             )
 
-            service_request_ref.update(
-                {
-                    "assignment_status": status,
-                }
-            )
+            assignment_data = {"assignment_status": status}
+
+            if travel_details:
+                assignment_data["travel_details"] = travel_details
+
+            service_request_ref.update(assignment_data)
 
             current_time = datetime.utcnow() + timedelta(hours=5, minutes=30)
 
@@ -183,6 +196,22 @@ class OnsiteServiceRequestCollection:
         except Exception as error:
             return False
 
+    def update_travel_details_for_service_request(
+            self, customer_id, service_request_id, travel_details):
+        try:
+            service_request_ref = (
+                self.db.collection("service_requests")
+                .document("onsite")
+                .collection(customer_id)
+                .document(service_request_id)
+            )
+
+            service_request_ref.update({"travel_details": travel_details})
+            return True
+
+        except Exception as error:
+            return False
+
     def fetch_latest_service_request_by_customer_id(
             self, customer_id, limit=2):
         if limit > 0:
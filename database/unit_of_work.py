@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import firestore
+
+from database.cloud_sql.backend import get_engine
+
+
+MAX_SIDE_EFFECT_WORKERS = 8
+
+
+class UnitOfWork:
+    def __init__(self, firestore_client=None):
+        self.firestore_client = firestore_client
+
+        self._db_conn = None
+        self._firestore_batch = None
+        self._side_effects = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.rollback()
+
+        self.close()
+
+        return False
+
+    @property
+    def db_conn(self):
+        # Opened on first use and shared by every SQL step of the unit
+        if self._db_conn is None:
+            self._db_conn = get_engine().connect()
+            self._db_conn.begin()
+
+        return self._db_conn
+
+    # Firestore caps a batch at 500 writes, plenty for one request workflow
+    @property
+    def firestore_batch(self):
+        if self._firestore_batch is None:
+            firestore_client = self.firestore_client or firestore.client()
+            self._firestore_batch = firestore_client.batch()
+
+        return self._firestore_batch
+
+    def after_commit(self, side_effect, *args, **kwargs):
+        self._side_effects.append((side_effect, args, kwargs))
+
+        return len(self._side_effects) - 1
+
+    def _run_side_effect(self, side_effect, args, kwargs):
+        try:
+            return side_effect(*args, **kwargs)
+
+        except Exception as error:
+            return False
+
+    def _run_side_effects(self):
+        side_effects, self._side_effects = self._side_effects, []
+
+        if not side_effects:
+            return []
+
+        # Side effects are independent network calls, overlap them
+        with ThreadPoolExecutor(
+            max_workers=min(len(side_effects), MAX_SIDE_EFFECT_WORKERS)
+        ) as executor:
+            futures = [
+                executor.submit(self._run_side_effect, side_effect, args, kwargs)
+                for side_effect, args, kwargs in side_effects
+            ]
+
+            return [future.result() for future in futures]
+
+    def commit(self):
+        # SQL first, a failed commit there leaves nothing written to Firestore
+        if self._db_conn is not None:
+            self._db_conn.commit()
+
+        if self._firestore_batch is not None:
+            self._firestore_batch.commit()
+            self._firestore_batch = None
+
+        # Hand the connection back to the pool before the slow network calls
+        self.close()
+
+        return self._run_side_effects()
+
+    def rollback(self):
+        if self._db_conn is not None:
+            self._db_conn.rollback()
+
+        self._firestore_batch = None
+        self._side_effects = []
+
+    def close(self):
+        if self._db_conn is not None:
+            self._db_conn.close()
+            self._db_conn = None
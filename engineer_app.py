@@ -22,11 +22,13 @@ import firebase_admin
 from firebase_admin import auth, credentials
 
 from backend.utils.geo_operations import LocationServices
+from backend.module.engineer_route_planner import EngineerRoutePlanner
 from backend.channels.email_client import TransactionalEmails
 from backend.channels.sms_client import NotificationSMS
 
 from database.firebase.firestore import OnsiteServiceRequestCollection
-from database.cloud_sql.queries import Appliances, QueryCustomers, QueryEngineers
+from database.cloud_sql.catalog import ApplianceCatalog
+from database.cloud_sql.queries import QueryCustomers, QueryEngineers
 from database.cloud_sql.migrations import MigrateEngineers
 from database.cloud_storage.document_storage import (
     CustomerRecordsBucket,
@@ -106,9 +108,9 @@ if "ticket_counts" not in st.session_state:
 
 if "distinct_appliance_details" not in st.session_state:
     try:
-        query_appliances = Appliances()
+        appliance_catalog = ApplianceCatalog()
         st.session_state.distinct_appliance_details = (
-            query_appliances.fetch_distinct_appliance_data()
+            appliance_catalog.fetch_distinct_appliance_data()
         )
     except Exception as error:
         pass
@@ -348,16 +350,6 @@ def dialog_manage_account():
                     "Profile updated succesfully!",
                     icon=":material/check:")
 
-                try:
-                    get_engineer_details.clear()
-                except Exception as error:
-                    pass
-
-                try:
-                    get_engineer_name.clear()
-                except Exception as error:
-                    pass
-
                 st.session_state.engineer_details = None
 
                 try:
@@ -465,11 +457,6 @@ def dialog_manage_account():
                     "Profile updated succesfully!",
                     icon=":material/check:")
 
-                try:
-                    get_engineer_details.clear()
-                except Exception as error:
-                    pass
-
                 st.session_state.engineer_details = None
 
                 try:
@@ -568,11 +555,6 @@ def dialog_manage_account():
                     "Profile updated succesfully!",
                     icon=":material/check:")
 
-                try:
-                    get_engineer_details.clear()
-                except Exception as error:
-                    pass
-
                 st.session_state.engineer_details = None
 
                 try:
@@ -948,10 +930,33 @@ def dialog_review_service_request(service_request_id, service_request_details):
         use_container_width=True,
         type="primary",
     ):
+        try:
+            engineer_address = f"""{
+                st.session_state.engineer_details.get("street")}, {
+                st.session_state.engineer_details.get("city")}, {
+                st.session_state.engineer_details.get("district")}, {
+                st.session_state.engineer_details.get("state")} - {
+                st.session_state.engineer_details.get("zip_code")}"""
+
+            customer_address = f"""{
+                service_request_details.get("address").get("street")}, {
+                service_request_details.get("address").get("city")}, {
+                service_request_details.get("address").get("state")} - {
+                service_request_details.get("address").get("zipcode")}"""
+
+            location_services = LocationServices()
+            travel_details = location_services.get_travel_details(
+                engineer_address, customer_address
+            )
+
+        except Exception as error:
+            travel_details = None
+
         status_updated = onsite_service_request_collection.update_assignment_status(
             service_request_details.get("customer_id"),
             service_request_id,
             "confirmed",
+            travel_details=travel_details,
         )
 
         try:
@@ -1541,9 +1546,43 @@ def dialog_view_service_request_details(
             )
 
 
+def get_travel_details_for_service_request(origin, service_request):
+    travel_details = service_request.get("travel_details")
+
+    if travel_details and travel_details.get(
+            "origin") == " ".join(origin.split()):
+        return travel_details
+
+    customer_address = f"""{
+        service_request.get("address").get("street")}, {
+        service_request.get("address").get("city")}, {
+        service_request.get("address").get("state")} - {
+        service_request.get("address").get("zipcode")}"""
+
+    location_services = LocationServices()
+    travel_details = location_services.get_travel_details(
+        origin, customer_address)
+
+    if travel_details:
+        onsite_service_request_collection = OnsiteServiceRequestCollection()
+        onsite_service_request_collection.update_travel_details_for_service_request(
+            service_request.get("customer_id"),
+            service_request.get("request_id"),
+            travel_details,
+        )
+
+        service_request["travel_details"] = travel_details
+
+    return travel_details
+
+
 @st.dialog("Directions to Customer Address", width="large")
 def display_directions_to_customer_location(
-    origin, destination, contact_number="Not Provided", email_id="Not Provided"
+    origin,
+    destination,
+    contact_number="Not Provided",
+    email_id="Not Provided",
+    travel_details=None,
 ):
     st.markdown(
         f"""
@@ -1558,9 +1597,73 @@ def display_directions_to_customer_location(
         unsafe_allow_html=True,
     )
 
+    if travel_details:
+        st.markdown(
+            f"""
+            <P>
+                <B>🚗 Distance: </B>{travel_details.get("distance")} km
+                &nbsp;&nbsp;&nbsp;&nbsp;
+                <B>🕒 Travel Time: </B>{travel_details.get("duration")} minutes
+            </P>
+            """,
+            unsafe_allow_html=True,
+        )
+
     with st.spinner("Finding the best route...", show_time=True):
         loc_services = LocationServices()
-        map_obj = loc_services.display_route_with_folium(origin, destination)
+        map_obj = loc_services.display_route_with_folium(
+            origin,
+            destination,
+            encoded_polyline=(
+                travel_details.get("encoded_polyline") if travel_details else None
+            ),
+        )
+
+    st.markdown(f"<H4>Route Preview:</H4>", unsafe_allow_html=True)
+
+    folium_static(map_obj)
+
+
+@st.dialog("Plan My Route", width="large")
+def display_planned_route_for_engineer(origin, service_requests):
+    customer_addresses = []
+
+    for service_request in service_requests:
+        customer_addresses.append(
+            f"""{
+                service_request.get("address").get("street")}, {
+                service_request.get("address").get("city")}, {
+                service_request.get("address").get("state")} - {
+                service_request.get("address").get("zipcode")}"""
+        )
+
+    with st.spinner("Planning the best order to visit customers...", show_time=True):
+        route_planner = EngineerRoutePlanner()
+        map_obj, route, total_duration = route_planner.display_planned_route_with_folium(
+            origin, customer_addresses
+        )
+
+    st.markdown(
+        f"""
+        <P>
+            <B>🕒 Estimated Travel Time: </B>{total_duration} minutes
+        </P>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    for stop_number, stop in enumerate(route, start=1):
+        service_request = service_requests[stop]
+
+        st.markdown(
+            f"""
+            <P>
+                <B>{stop_number}. {service_request.get('request_title')}</B>
+                ({service_request.get('request_id')})<BR>{customer_addresses[stop]}
+            </P>
+            """,
+            unsafe_allow_html=True,
+        )
 
     st.markdown(f"<H4>Route Preview:</H4>", unsafe_allow_html=True)
 
@@ -1630,7 +1733,6 @@ if st.session_state.themes["refreshed"] == False:
 if __name__ == "__main__":
     if st.session_state.engineer_id:
 
-        @st.cache_data(show_spinner=False)
         def get_engineer_details(full_details=False):
             query_engineers = QueryEngineers()
             engineer_details = query_engineers.fetch_engineer_details_by_id(
@@ -1773,7 +1875,6 @@ if __name__ == "__main__":
                 ):
                     dialog_manage_account()
 
-            @st.cache_data(show_spinner=False)
             def get_engineer_name(full_name=True):
                 query_engineers = QueryEngineers()
 
@@ -1951,7 +2052,19 @@ if __name__ == "__main__":
                                         unsafe_allow_html=True,
                                     )
 
-                                    st.write(" ")
+                                    if service_request.get("travel_details"):
+                                        st.markdown(
+                                            f"""
+                                            <P align='right'>
+                                                🚗 {service_request.get('travel_details').get('distance')} km &nbsp;•&nbsp; {service_request.get('travel_details').get('duration')} min &nbsp
+                                            </P>
+                                            """,
+                                            unsafe_allow_html=True,
+                                        )
+
+                                    else:
+                                        st.write(" ")
+
                                     colx, coly = st.columns([0.9, 3])
 
                                     with colx:
@@ -2001,6 +2114,10 @@ if __name__ == "__main__":
                                                     service_request.get(
                                                         "customer_contact"
                                                     ).get("email"),
+                                                    travel_details=get_travel_details_for_service_request(
+                                                        engineer_address,
+                                                        service_request,
+                                                    ),
                                                 )
 
                                             except Exception as error:
@@ -2022,6 +2139,74 @@ if __name__ == "__main__":
                                                 service_request,
                                             )
 
+                    if assigned_count > 1:
+                        if st.button(
+                            "Plan My Route",
+                            icon=":material/route:",
+                            use_container_width=True,
+                        ):
+                            route_service_requests = [
+                                service_request
+                                for service_request in st.session_state.onsite_service_requests
+                                if (
+                                    service_request.get("assignment_status")
+                                    == "confirmed"
+                                )
+                                and (
+                                    service_request.get("ticket_status")
+                                    != "resolved"
+                                )
+                            ]
+
+                            if len(route_service_requests) == 0:
+                                st.toast(
+                                    "You have no confirmed open requests to plan a route for"
+                                )
+
+                            elif (
+                                len(route_service_requests)
+                                > EngineerRoutePlanner.MAX_STOPS
+                            ):
+                                st.toast(
+                                    f"A route can have at most {
+                                        EngineerRoutePlanner.MAX_STOPS} stops, you have {
+                                        len(route_service_requests)} open requests"
+                                )
+
+                            else:
+                                try:
+                                    st.toast("Planning your route")
+
+                                    query_engineers = QueryEngineers()
+
+                                    engineer_address_data = query_engineers.fetch_engineer_details_by_id(
+                                        st.session_state.engineer_id,
+                                        [
+                                            "street",
+                                            "city",
+                                            "district",
+                                            "state",
+                                            "zip_code",
+                                        ],
+                                    )
+
+                                    engineer_address = f"""{
+                                        engineer_address_data.get("street")}, {
+                                        engineer_address_data.get("city")}, {
+                                        engineer_address_data.get("district")}, {
+                                        engineer_address_data.get("state")} - {
+                                        engineer_address_data.get("zip_code")}"""
+
+                                    display_planned_route_for_engineer(
+                                        engineer_address,
+                                        route_service_requests,
+                                    )
+
+                                except Exception as error:
+                                    st.toast(
+                                        "Location services are currently unavailable"
+                                    )
+
                     if assigned_count == 0:
                         st.markdown("<BR>" * 4, unsafe_allow_html=True)
 
@@ -2503,6 +2688,11 @@ if __name__ == "__main__":
                                     request_id_to_view)
                                 .get("customer_contact")
                                 .get("email"),
+                                travel_details=get_travel_details_for_service_request(
+                                    engineer_address,
+                                    open_service_requests.get(
+                                        request_id_to_view),
+                                ),
                             )
 
                     with colz:
@@ -3060,11 +3250,11 @@ if __name__ == "__main__":
                             configuration_information, icon=":material/info:"
                         )
 
-                        query_appliances = Appliances()
+                        appliance_catalog = ApplianceCatalog()
 
                         if "cache_category" not in st.session_state:
                             st.session_state.cache_category = (
-                                query_appliances.fetch_category_by_sub_caegory(
+                                appliance_catalog.fetch_category_by_sub_caegory(
                                     st.session_state.cache_sub_category
                                 )
                             )